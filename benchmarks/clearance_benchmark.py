@@ -0,0 +1,37 @@
+"""Clearance query time between two sphere meshes at decreasing gaps down to intersecting, with and without a cutoff
+threshold, and the time to build their bounding volume hierarchies"""
+from co_pylot_widget.clearance import BVH, clearance
+from co_pylot_widget.meshcache import MeshCache
+from synthetic import sphere_stl
+import numpy as np
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+def timed(fun, *args, repeat=1, **kwargs):
+    start = time.perf_counter()
+    for i in range(repeat):
+        result = fun(*args, **kwargs)
+    return (time.perf_counter() - start) / repeat, result
+
+
+if __name__ == "__main__":
+    n_triangles = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    directory = Path(tempfile.mkdtemp())
+    cache = MeshCache(directory / 'cache')
+    _, vertexes_a, faces_a, _ = cache.load(sphere_stl(directory / 'a.stl', n_triangles, radius=100))
+    _, vertexes_b, faces_b, _ = cache.load(sphere_stl(directory / 'b.stl', n_triangles, radius=50))
+    build_time, bvh_a = timed(BVH, vertexes_a, faces_a)
+    bvh_b = BVH(vertexes_b, faces_b)
+    print(f'{len(faces_a)} and {len(faces_b)} triangles, bvh build {build_time * 1e3:.0f} ms per mesh')
+
+    threshold = 5
+    print(f'{"gap":>8} {"distance":>10} {"exact":>10} {f"cutoff {threshold}":>12}')
+    for gap in [250, 10, 1, 0.5, -10, -50]:
+        matrix_b = np.eye(4)
+        matrix_b[0, 3] = 150 + gap
+        exact_time, (distance, _) = timed(clearance, bvh_a, np.eye(4), bvh_b, matrix_b, repeat=5)
+        cutoff_time, _ = timed(clearance, bvh_a, np.eye(4), bvh_b, matrix_b, cutoff=threshold, repeat=5)
+        print(f'{gap:>8} {distance:>10.3f} {exact_time * 1e3:>7.1f} ms {cutoff_time * 1e3:>9.1f} ms')
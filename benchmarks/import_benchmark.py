@@ -0,0 +1,31 @@
+"""Time to import the widget in a fresh interpreter compared to also importing sympy and stl as the widget did at
+import before expressions were compiled by the built-in compiler and stl was imported on first parse"""
+import os
+import statistics
+import subprocess
+import sys
+
+STATEMENTS = {'qt and pyqtgraph only': 'import qtpy.QtWidgets, pyqtgraph.opengl',
+              'co_pylot_widget': 'import co_pylot_widget.copylot',
+              'co_pylot_widget + sympy + stl': 'import co_pylot_widget.copylot, sympy, stl; '
+                                               'import sympy.parsing.sympy_parser'}
+
+
+def import_time(statement: str, repeat: int, env: dict):
+    """Median time of running statement in a fresh python process, timed inside the process"""
+    times = []
+    for i in range(repeat):
+        result = subprocess.run([sys.executable, '-c', f'import time; s = time.perf_counter(); {statement}; '
+                                                       f'print(time.perf_counter() - s)'],
+                                capture_output=True, text=True, check=True, env=env)
+        times.append(float(result.stdout.split()[-1]))
+    return statistics.median(times)
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, 'QT_QPA_PLATFORM': 'offscreen',
+           'PYTHONPATH': os.pathsep.join([root, os.environ.get('PYTHONPATH', '')])}
+    for name, statement in STATEMENTS.items():
+        print(f'{name:<32} {import_time(statement, repeat, env) * 1e3:8.1f} ms')
@@ -0,0 +1,50 @@
+"""Load time and array memory of an stl file parsed into an unindexed mesh compared to the welded mesh cache when cold,
+loaded from the disk cache after a restart and shared in memory"""
+import os
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from co_pylot_widget.meshcache import MeshCache
+from synthetic import sphere_stl
+import pyqtgraph.opengl as gl
+import numpy as np
+import stl
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+def timed(fun, *args):
+    start = time.perf_counter()
+    result = fun(*args)
+    return time.perf_counter() - start, result
+
+
+def unindexed_load(path):
+    """Mesh loaded as done before the mesh cache"""
+    stl_mesh = stl.mesh.Mesh.from_file(path)
+    points = stl_mesh.points.reshape(-1, 3)
+    faces = np.arange(points.shape[0]).reshape(-1, 3)
+    return gl.MeshData(vertexes=points, faces=faces)
+
+
+if __name__ == "__main__":
+    n_triangles = int(sys.argv[1]) if len(sys.argv) > 1 else 180000
+    directory = Path(tempfile.mkdtemp())
+    path = sphere_stl(directory / 'sphere.stl', n_triangles)
+    print(f'{path.stat().st_size / 1e6:.1f} MB stl')
+
+    unindexed_time, meshdata = timed(unindexed_load, path)
+    unindexed_bytes = meshdata.vertexes().nbytes + meshdata.faces().nbytes
+    normals_time, _ = timed(meshdata.vertexNormals)  # Done by GLMeshItem on first paint with smooth=True
+    cold_time, (key, vertexes, faces, normals) = timed(MeshCache(directory / 'cache').load, path)
+    warm_cache = MeshCache(directory / 'cache')  # New cache as after restarting the gui
+    warm_time, _ = timed(warm_cache.load, path)
+    memory_time, _ = timed(warm_cache.load, path)
+
+    print(f'unindexed parse:        {unindexed_time * 1e3:8.1f} ms {unindexed_bytes / 1e6:6.1f} MB')
+    print(f'unindexed normals:      {normals_time * 1e3:8.1f} ms on first paint')
+    print(f'cold cache parse+weld:  {cold_time * 1e3:8.1f} ms '
+          f'{(vertexes.nbytes + faces.nbytes + normals.nbytes) / 1e6:6.1f} MB (with vertex normals)')
+    print(f'disk cache after restart: {warm_time * 1e3:6.1f} ms memory mapped')
+    print(f'shared in memory:       {memory_time * 1e3:8.3f} ms')
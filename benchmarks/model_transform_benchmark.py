@@ -0,0 +1,93 @@
+"""Per update cost of evaluating cad model orientations with the example's mount, objectives and weirdmount models.
+Compares the compiled orientations used by CoPylot against parsing the expressions with sympy on every update. The
+sympy comparison is skipped unless the sympy extra is installed e.g. with pip install -e .[sympy]"""
+import os
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from co_pylot_widget.copylot import CoPylot
+from synthetic import random_stl
+from qtpy.QtWidgets import QApplication
+import qtpy.QtGui
+import tempfile
+import timeit
+from pathlib import Path
+try:
+    from sympy import symbols
+    from sympy.parsing.sympy_parser import parse_expr
+except ImportError:  # Optional dependency only needed for the comparison
+    symbols = parse_expr = None
+
+
+def sympy_model_transform_matrix(stagemap, orientation):
+    """Transform matrix evaluated by parsing every expression with sympy as done before orientations were compiled"""
+    matrix_transform = {v.lstrip('-'): k for k, v in stagemap.coordinate_transformation_map.items() if '0' not in k}
+    m = {matrix_transform[k]: orientation[i:i + 4] for k, i in zip(sorted(matrix_transform.keys()), range(0, 13, 4))}
+    orientation = [*m['x'], *m['y'], *m['z'], *orientation[12:]]
+    stage_position = stagemap.stage_to_map_coord_transform(dict(stagemap.stage_position))
+    map_variable = {**matrix_transform, **{k: k for k in stage_position.keys() if k not in matrix_transform.keys()}}
+    variables = symbols(list(set(stage_position.keys()) | set(matrix_transform.keys())))
+    for i, var in enumerate(orientation):
+        if type(var) == str:
+            fun = parse_expr(var)
+            expression = fun.subs([(var, stage_position[map_variable[str(var)]]) for var in variables])
+            orientation[i] = expression.evalf()
+    return qtpy.QtGui.QMatrix4x4(orientation)
+
+
+if __name__ == "__main__":
+    app = QApplication([])
+    stagemap = CoPylot(stage_position={'x': 0, 'y': 0, 'z': 200, 't': 0},
+                       coordinate_transformation_map={'x': 'z', 'y': 'x', 'z': '-y'},
+                       scanning_volume={'x': 50, 'y': 50, 'z': 50},
+                       limits={'x': [-100, 100], 'y': [-200, 200], 'z': [-100, 500]},
+                       fov={'x': 20, 'y': 20},
+                       tile_overlap_pct={'x': 20, 'y': 20})
+    mesh_path = random_stl(Path(tempfile.mkdtemp()) / 'model.stl')
+
+    stagemap.add_cad_model('mount', mesh_path,
+                           (1, 0, 0, (abs(stagemap.limits['x'][1]) - abs(stagemap.limits['x'][0])) / 2,
+                            0, 1, 0, 'y',
+                            0, 0, 1, (abs(stagemap.limits['z'][1]) - abs(stagemap.limits['z'][0])) / 2,
+                            0, 0, 0, 1))
+    stagemap.add_cad_model('objectives', mesh_path,
+                           (1, 0, 0, 'x',
+                            0, 1, 0, stagemap.limits['y'][1],
+                            0, 0, 1, 'z',
+                            0, 0, 0, 1))
+    stagemap.add_cad_model('weirdmount', mesh_path,
+                           (1, 0, 0, (abs(stagemap.limits['x'][1]) - abs(stagemap.limits['x'][0])) / 2 + 500,
+                            0, 'cos(t)', 'sin(t)', 'y',
+                            0, '-sin(t)', 'cos(t)', (abs(stagemap.limits['z'][1]) - abs(stagemap.limits['z'][0])) / 2,
+                            0, 0, 0, 1))
+
+    def sympy_update():
+        for model in stagemap._cad_models.values():
+            model[0].setTransform(sympy_model_transform_matrix(stagemap, model[1]))
+
+    def compiled_update():
+        stage_position = stagemap.stage_to_map_coord_transform(dict(stagemap.stage_position))
+        for model in stagemap._cad_models.values():
+            model[0].setTransform(stagemap.model_transform_matrix(model[2], stage_position))
+
+    steps = iter(range(10 ** 9))
+
+    def move(*axes):
+        """Move stage along axes and update map so only models depending on those axes are transformed"""
+        step = next(steps)
+        stagemap._stage_position.update({k: step for k in axes}, emit=False)
+        stagemap.update_map()
+
+    number = 200
+    compiled_time = min(timeit.repeat(compiled_update, number=number, repeat=3)) / number
+    all_axes_time = min(timeit.repeat(lambda: move('x', 'y', 'z', 't'), number=number, repeat=3)) / number
+    x_time = min(timeit.repeat(lambda: move('x'), number=number, repeat=3)) / number
+    static_time = min(timeit.repeat(stagemap.update_map, number=number, repeat=3)) / number
+    if parse_expr is not None:
+        sympy_time = min(timeit.repeat(sympy_update, number=number // 10, repeat=3)) / (number // 10)
+        print(f'sympy models per update:    {sympy_time * 1e3:.3f} ms')
+        print(f'compiled models per update: {compiled_time * 1e3:.3f} ms ({sympy_time / compiled_time:.1f}x faster)')
+    else:
+        print(f'compiled models per update: {compiled_time * 1e3:.3f} ms (install the sympy extra to compare)')
+    print(f'update_map moving x, y, z, t: {all_axes_time * 1e3:.3f} ms')
+    print(f'update_map moving x only:   {x_time * 1e3:.3f} ms (objectives transformed)')
+    print(f'update_map without moving:  {static_time * 1e3:.3f} ms (no model transformed)')
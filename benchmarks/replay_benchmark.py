@@ -0,0 +1,62 @@
+"""End to end throughput of the update pipeline replaying a stage position recording as fast as possible. Without a
+recording file a random walk with fov, scanning volume and coordinate transform changes is recorded first. Usage:
+    python benchmarks/replay_benchmark.py [recording.bin] [--speed 1]"""
+from qtpy.QtWidgets import QApplication
+from qtpy.QtCore import QCoreApplication
+from co_pylot_widget.instrumentation import format_stats
+from co_pylot_widget.recording import Recorder, Replayer
+from synthetic import sphere_stl
+from run_benchmarks import create_stagemap
+import argparse
+import numpy as np
+import tempfile
+import time
+from pathlib import Path
+
+
+def random_walk_recording(path, positions=100000, rate=1000):
+    """Write a recording of a stage random walk sampled at rate Hz with attribute changes along the way"""
+    steps = np.random.default_rng(0).choice([-1, 1], size=(positions, 4)).cumsum(axis=0) + [0, 0, 200, 0]
+    changes = {positions // 4: ('scanning_volume', {'x': 400, 'y': 50, 'z': 150}),
+               positions // 2: ('fov', {'x': 50, 'y': 50}),
+               3 * positions // 4: ('coordinate_transformation_map', {'x': 'y', 'y': 'z', 'z': '-x'})}
+    with Recorder(path) as recorder:
+        for i, (x, y, z, t) in enumerate(steps):
+            if i in changes:
+                recorder.record_attribute(*changes[i], timestamp=i / rate)
+            recorder.record_position({'x': x, 'y': y, 'z': z, 't': t}, timestamp=i / rate)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('recording', type=Path, nargs='?', help='recording written by CoPylot.start_recording')
+    parser.add_argument('--speed', type=float, default=None, help='playback rate. Omit to play as fast as possible')
+    parser.add_argument('--positions', type=int, default=100000, help='positions of generated random walk')
+    parser.add_argument('--triangles', type=int, default=100000, help='faces of synthetic stl meshes')
+    args = parser.parse_args()
+
+    app = QApplication([])
+    directory = Path(tempfile.mkdtemp())
+    path = args.recording or random_walk_recording(directory / 'walk.bin', args.positions)
+    stagemap = create_stagemap(directory / 'cache')
+    stagemap.instrumentation.enabled = True
+    mesh_path = sphere_stl(directory / 'sphere.stl', args.triangles)
+    stagemap.add_cad_model('mount', mesh_path, (1, 0, 0, 'x', 0, 1, 0, 'y', 0, 0, 1, 'z', 0, 0, 0, 1))
+    stagemap.tiling_widget.setChecked(True)
+
+    replayer = Replayer(path, args.speed)
+    start = time.perf_counter()
+    thread = replayer.start(stagemap)
+    while thread.is_alive():
+        QCoreApplication.processEvents()
+    thread.join()
+    while True:  # Deliver positions and attributes still queued by the replayer and draw them
+        QCoreApplication.processEvents()
+        if stagemap._pushed_stage_position is None and not stagemap._update_timer.isActive():
+            break
+    elapsed = time.perf_counter() - start
+    print(f'{replayer.played} records in {elapsed:.3f} s, {replayer.played / elapsed:.0f} records/s, '
+          f'{stagemap.updates_rendered / elapsed:.1f} map updates/s')
+    print(f'final stage position {dict(stagemap.stage_position)}')
+    print(format_stats(stagemap.stats()))
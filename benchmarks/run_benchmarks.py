@@ -0,0 +1,312 @@
+"""Headless benchmark suite of CoPylot. Runs with Qt's offscreen platform so no display or gpu is needed and writes
+results as json. Given a baseline json, results are compared against it and the script exits with status 1 if any case
+got slower than the threshold.
+
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --baseline results.json --threshold 0.25
+"""
+import os
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from co_pylot_widget.copylot import CoPylot
+from synthetic import sphere_stl
+from qtpy.QtWidgets import QApplication
+import numpy as np
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+def timings(fun, repeat: int, setup=None):
+    """Time repeated calls of function after an untimed warm-up call. Garbage collection is disabled while timing as
+    in timeit
+    :param setup: function called before each timed call and not timed
+    :return: dictionary of median, min and number of timed calls in seconds"""
+    if setup is not None:
+        setup()
+    fun()
+    times = []
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for i in range(repeat):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            fun()
+            times.append(time.perf_counter() - start)
+    finally:
+        if enabled:
+            gc.enable()
+    return {'median_s': statistics.median(times), 'min_s': min(times), 'n': repeat}
+
+
+def throughput(fun, number: int = None, repeat: int = 5):
+    """Time a fast function in repeated blocks of calls after an untimed warm-up call. Single calls are too short to
+    time and one block picks up whatever else the machine did, so the best block is the stable figure
+    :param number: calls per block. Defaults to enough calls for a block to take 0.2 s
+    :param repeat: number of timed blocks
+    :return: dictionary of median and min time per call over blocks, number of timed calls and calls per second of
+    the best block"""
+    fun()
+    timer = timeit.Timer(fun)
+    if number is None:
+        number, _ = timer.autorange()
+    times = [elapsed / number for elapsed in timer.repeat(repeat, number)]
+    return {'median_s': statistics.median(times), 'min_s': min(times), 'n': number * repeat, 'per_s': 1 / min(times)}
+
+
+def create_stagemap(cache_dir):
+    return CoPylot(stage_position={'x': 0, 'y': 0, 'z': 200, 't': 0},
+                   coordinate_transformation_map={'x': 'z', 'y': 'x', 'z': '-y'},
+                   scanning_volume={'x': 50, 'y': 50, 'z': 50},
+                   limits={'x': [-100, 100], 'y': [-200, 200], 'z': [-100, 500]},
+                   fov={'x': 20, 'y': 20},
+                   tile_overlap_pct={'x': 0, 'y': 0},
+                   mesh_cache_dir=cache_dir)
+
+
+def bench_update_map(stagemap, mesh_path, model_counts, repeat):
+    """update_map latency after a stage move with models depending on the moved axis"""
+    results = {}
+    steps = iter(range(10 ** 9))
+
+    def move():
+        stagemap._stage_position.update({'x': next(steps)}, emit=False)
+
+    for count in model_counts:
+        for name in list(stagemap._cad_models.keys()):
+            stagemap.remove_cad_model(name)
+        for i in range(count):
+            stagemap.add_cad_model(f'model{i}', mesh_path, (1, 0, 0, 'x', 0, 1, 0, 'y', 0, 0, 1, 'z', 0, 0, 0, 1))
+        results[f'update_map[models={count}]'] = timings(stagemap.update_map, repeat, setup=move)
+    for name in list(stagemap._cad_models.keys()):
+        stagemap.remove_cad_model(name)
+    return results
+
+
+def bench_draw_tiles(stagemap, tile_counts, repeat):
+    """draw_tiles when tile geometry is rebuilt and when only stage position moved"""
+    results = {}
+    fov = stagemap.fov['x']
+    for count in tile_counts:
+        side = int(np.ceil(np.sqrt(count)))
+        stagemap.scanning_volume = {'x': fov * side, 'y': fov * max(int(np.ceil(count / side)), 1), 'z': 50}
+
+        def rebuild():
+            stagemap._tiles_geometry_key = None
+
+        results[f'draw_tiles[tiles={count}]'] = timings(stagemap.draw_tiles, repeat, setup=rebuild)
+        stagemap.draw_tiles()
+        results[f'draw_tiles_position_only[tiles={count}]'] = timings(
+            stagemap.draw_tiles, repeat, setup=lambda: stagemap._stage_position.update(
+                {'x': stagemap.stage_position['x'] + 1}, emit=False))
+    return results
+
+
+def bench_tile_plan(stagemap, tiles, repeat):
+    """Streaming a tile plan in chunks and drawing its overlay past the visible tile budget"""
+    results = {}
+    fov = stagemap.fov['x']
+    side = int(np.ceil(np.sqrt(tiles)))
+    scanning_volume = {'x': fov * side, 'y': fov * side, 'z': 0}
+    for order in ['raster', 'serpentine']:
+        plan = lambda: sum(len(chunk) for chunk in stagemap.engine.tile_plan(
+            stagemap.stage_position, scanning_volume, stagemap.fov, stagemap.tile_overlap_pct, order))
+        results[f'tile_plan[tiles={side ** 2},{order}]'] = timings(plan, repeat)
+
+    def rebuild():
+        stagemap._tiles_geometry_key = None
+
+    stagemap.scanning_volume = scanning_volume
+    results[f'draw_tiles[tiles={side ** 2},budget={stagemap.max_visible_tiles}]'] = timings(
+        stagemap.draw_tiles, repeat, setup=rebuild)
+    return results
+
+
+def bench_add_cad_model(stagemap, mesh_path, directory, repeat):
+    """add_cad_model load time when parsing the stl file, from the disk cache and from memory"""
+    results = {}
+    cold_dirs = iter(directory / f'cold{i}' for i in range(repeat + 1))  # Including the warm-up call
+
+    def cold_cache():
+        stagemap.mesh_cache.cache_dir = next(cold_dirs)
+        stagemap.mesh_cache.clear()
+
+    def warm_cache():
+        stagemap.mesh_cache.cache_dir = directory / 'warm'
+        stagemap.mesh_cache.clear()
+
+    add = lambda: stagemap.add_cad_model('model', mesh_path, (1, 0, 0, 'x', 0, 1, 0, 'y', 0, 0, 1, 'z', 0, 0, 0, 1))
+    results['add_cad_model[cold]'] = timings(add, repeat, setup=cold_cache)
+    warm_cache()
+    add()
+    results['add_cad_model[disk_cache]'] = timings(add, repeat, setup=warm_cache)
+    results['add_cad_model[memory]'] = timings(add, repeat)
+    stagemap.remove_cad_model('model')
+    return results
+
+
+def bench_set_point(stagemap, points, repeat=5):
+    """Time per point of marking many points in repeated blocks adding up to points"""
+    steps = iter(range(10 ** 9))
+
+    def mark():
+        stagemap._stage_position.update({'x': next(steps)}, emit=False)
+        stagemap.set_point()
+
+    return {f'set_point[points={points}]': throughput(mark, max(points // repeat, 1), repeat)}
+
+
+def bench_add_points(stagemap, points, repeat):
+    """Bulk marking of many points and nearest point query among them"""
+    positions = np.random.default_rng(0).normal(size=(points, len(stagemap.points.axes))) * 100
+    labels = [f'point{i}' for i in range(points)]
+    results = {f'add_points[points={points}]': timings(lambda: stagemap.add_points(positions, labels=labels), repeat,
+                                                       setup=stagemap.points.clear)}
+    stagemap.nearest_points()
+    results[f'nearest_points[points={points}]'] = throughput(stagemap.nearest_points)
+    stagemap.remove_points(np.arange(len(stagemap.points)))
+    return results
+
+
+def bench_stage_attributes(stagemap, number=None):
+    """Raw throughput of reading and writing stage coordinate attributes"""
+    position = {'x': 1, 'y': 2, 'z': 3, 't': 0}
+
+    def write():
+        stagemap.stage_position = position
+
+    def write_item():
+        stagemap.stage_position['x'] = 1
+
+    return {'stage_attribute[get]': throughput(lambda: stagemap.stage_position, number),
+            'stage_attribute[set]': throughput(write, number),
+            'stage_attribute[setitem]': throughput(write_item, number)}
+
+
+def calibration():
+    """Fixed python and numpy workload independent of CoPylot timing the speed of the machine"""
+    matrix = np.random.default_rng(0).random((100, 100))
+
+    def work():
+        sum(i * i for i in range(2000))
+        matrix @ matrix
+
+    return {'calibration': throughput(work)}
+
+
+def merged(results: dict, current: dict):
+    """Results of several rounds of the suite. The speed of shared or virtual machines drifts over seconds, so rounds
+    spread the samples of each case over the run and its fastest round is kept
+    :return: dictionary of results with the fastest round, fastest median of rounds and total number of timed calls"""
+    results = dict(results)
+    for name, result in current.items():
+        if name in results:
+            best = min(results[name], result, key=lambda r: r['min_s'])
+            result = dict(best, median_s=min(results[name]['median_s'], result['median_s']),
+                          n=results[name]['n'] + result['n'])
+        results[name] = result
+    return results
+
+
+def formatted(seconds: float):
+    """Time in ms or us for short times"""
+    return f'{seconds * 1e3:9.3f} ms' if seconds >= 1e-5 else f'{seconds * 1e6:9.3f} us'
+
+
+def compare(results: dict, baseline: dict, threshold: float):
+    """Print comparison of fastest times of results against baseline. The fastest time is the least disturbed by other
+    load of the machine so unchanged code compares equal between runs. Ratios are scaled by the calibration case so a
+    machine running slower than when the baseline was stored does not show as regressions
+    :return: names of cases slower than baseline by more than threshold"""
+    regressions = []
+    scale = 1
+    if 'calibration' in results['results'] and 'calibration' in baseline['results']:
+        scale = results['results']['calibration']['min_s'] / baseline['results']['calibration']['min_s']
+    print(f'machine speed against baseline {1 / scale:.2f}x')
+    print(f'{"case":<45} {"baseline":>12} {"current":>12} {"ratio":>7}')
+    for name, result in results['results'].items():
+        if name == 'calibration':
+            continue
+        if name not in baseline['results']:
+            print(f'{name:<45} {"-":>12} {formatted(result["min_s"])} {"new":>7}')
+            continue
+        ratio = result['min_s'] / baseline['results'][name]['min_s'] / scale
+        flag = ' SLOWER' if ratio > 1 + threshold else ''
+        if flag:
+            regressions.append(name)
+        print(f'{name:<45} {formatted(baseline["results"][name]["min_s"])} '
+              f'{formatted(result["min_s"])} {ratio:>6.2f}x{flag}')
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', type=Path, help='json file to write results to')
+    parser.add_argument('--baseline', type=Path, help='json file of stored results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed slowdown against baseline e.g. 0.2')
+    parser.add_argument('--triangles', type=int, default=100000, help='faces of synthetic stl meshes')
+    parser.add_argument('--models', type=int, nargs='+', default=[1, 10, 50], help='model counts of update_map')
+    parser.add_argument('--tiles', type=int, nargs='+', default=[10, 100, 1000, 10000, 100000],
+                        help='tile counts of draw_tiles')
+    parser.add_argument('--plan-tiles', type=int, default=1000000, help='tile count of streamed tile plans')
+    parser.add_argument('--points', type=int, default=1000, help='number of points marked with set_point')
+    parser.add_argument('--repeat', type=int, default=20, help='timed calls per case')
+    parser.add_argument('--rounds', type=int, default=3,
+                        help='times the whole suite is run. Each case keeps its fastest round')
+    parser.add_argument('--retries', type=int, default=2,
+                        help='extra rounds run to confirm cases slower than baseline before failing')
+    args = parser.parse_args()
+
+    app = QApplication([])
+    directory = Path(tempfile.mkdtemp())
+    stagemap = create_stagemap(directory / 'warm')
+    mesh_path = sphere_stl(directory / 'sphere.stl', args.triangles)
+
+    def suite(round_):
+        results = calibration()
+        results.update(bench_update_map(stagemap, mesh_path, args.models, args.repeat))
+        results.update(bench_draw_tiles(stagemap, args.tiles, args.repeat))
+        results.update(bench_tile_plan(stagemap, args.plan_tiles, max(args.repeat // 4, 1)))
+        results.update(bench_add_cad_model(stagemap, mesh_path, directory / f'round{round_}', args.repeat))
+        results.update(bench_stage_attributes(stagemap))
+        results.update(bench_set_point(stagemap, args.points))
+        results.update(bench_add_points(stagemap, args.points * 10, args.repeat))
+        return results
+
+    results = {}
+    for round_ in range(args.rounds):
+        results = merged(results, suite(round_))
+    regressions = []
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text())
+        regressions = compare({'results': results}, baseline, args.threshold)
+        for retry in range(args.retries):  # Fastest times only drop so noise clears while real regressions stay slower
+            if not regressions:
+                break
+            print(f'\nRerunning suite to confirm {len(regressions)} slower cases\n')
+            results = merged(results, suite(args.rounds + retry))
+            regressions = compare({'results': results}, baseline, args.threshold)
+    output = {'meta': {'timestamp': datetime.now(timezone.utc).isoformat(),
+                       'python': platform.python_version(),
+                       'platform': platform.platform(),
+                       'numpy': np.__version__,
+                       'args': {k: str(v) if isinstance(v, Path) else v for k, v in vars(args).items()}},
+              'results': results}
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(output, indent=2))
+    if args.baseline is not None:
+        sys.exit(1 if regressions else 0)
+    print(f'{"case":<45} {"min":>12} {"median":>12}')
+    for name, result in results.items():
+        print(f'{name:<45} {formatted(result["min_s"])} {formatted(result["median_s"])}')
@@ -0,0 +1,28 @@
+"""Synthetic stl files for benchmarks"""
+import numpy as np
+import stl
+
+
+def random_stl(path, n_triangles=1000):
+    """Write a binary stl file of random triangles"""
+    mesh = stl.mesh.Mesh(np.zeros(n_triangles, dtype=stl.mesh.Mesh.dtype))
+    mesh.vectors[:] = np.random.default_rng(0).random((n_triangles, 3, 3)) * 100
+    mesh.save(str(path))
+    return path
+
+
+def sphere_stl(path, n_triangles=100000, radius=100):
+    """Write a binary stl file of a closed uv sphere with about n_triangles faces so vertices are shared between
+    triangles like a cad export"""
+    rows = cols = max(int(np.sqrt(n_triangles / 2)), 3)
+    theta = np.linspace(0, np.pi, rows + 1)[:, None]
+    phi = np.linspace(0, 2 * np.pi, cols + 1)[None, :]
+    grid = np.stack([np.sin(theta) * np.cos(phi), np.sin(theta) * np.sin(phi), np.cos(theta) * np.ones_like(phi)],
+                    axis=-1) * radius
+    a, b, c, d = grid[:-1, :-1], grid[:-1, 1:], grid[1:, 1:], grid[1:, :-1]
+    triangles = np.concatenate([np.stack([a, b, c], axis=-2).reshape(-1, 3, 3),
+                                np.stack([a, c, d], axis=-2).reshape(-1, 3, 3)])
+    mesh = stl.mesh.Mesh(np.zeros(len(triangles), dtype=stl.mesh.Mesh.dtype))
+    mesh.vectors[:] = triangles
+    mesh.save(str(path))
+    return path
@@ -0,0 +1,77 @@
+"""Time to draw tiles of growing tile grids as one line item compared to one GLBoxItem per tile with cad models removed
+and added back around every tile"""
+import os
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from co_pylot_widget.copylot import CoPylot
+from synthetic import random_stl
+from co_pylot_widget.tiling import tile_grid
+from qtpy.QtWidgets import QApplication
+import pyqtgraph.opengl as gl
+import qtpy.QtGui
+import tempfile
+import time
+from pathlib import Path
+
+
+def box_item_draw_tiles(stagemap, tiles):
+    """Draw tiles with one GLBoxItem per tile as done before tiles were batched"""
+    for item in tiles:
+        stagemap.plot.removeItem(item)
+    tiles.clear()
+    stage_position = stagemap.stage_to_map_coord_transform(dict(stagemap.stage_position))
+    fov = stagemap.stage_to_map_coord_transform(dict(stagemap.fov))
+    grid_step, steps, tile_volume = tile_grid(stagemap.stage_to_map_coord_transform(dict(stagemap.scanning_volume)),
+                                              fov,
+                                              stagemap.stage_to_map_coord_transform(dict(stagemap.tile_overlap_pct)))
+    for x in range(steps['x']):
+        for y in range(steps['y']):
+            for z in range(steps['z']):
+                current_tile = {'x': x, 'y': y, 'z': z}
+                tile_pos = {k: (axis * grid_step[k]) - (.5 * fov.get(k, 0)) + stage_position[k]
+                            for k, axis in current_tile.items()}
+                box = gl.GLBoxItem()
+                box.translate(tile_pos['x'], tile_pos['y'], tile_pos['z'])
+                box.setSize(**tile_volume)
+                box.setColor(qtpy.QtGui.QColor('cornflowerblue'))
+                tiles.append(box)
+                stagemap.remove_models_from_plot()
+                stagemap.plot.addItem(box)
+                stagemap.add_models_to_plot()
+
+
+def timed(fun, *args, repeat=3):
+    """Best time of calling function"""
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        fun(*args)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+if __name__ == "__main__":
+    app = QApplication([])
+    stagemap = CoPylot(stage_position={'x': 0, 'y': 0, 'z': 200, 't': 0},
+                       coordinate_transformation_map={'x': 'z', 'y': 'x', 'z': '-y'},
+                       scanning_volume={'x': 50, 'y': 50, 'z': 50},
+                       limits={'x': [-100, 100], 'y': [-200, 200], 'z': [-100, 500]},
+                       fov={'x': 20, 'y': 20},
+                       tile_overlap_pct={'x': 0, 'y': 0})
+    mesh_path = random_stl(Path(tempfile.mkdtemp()) / 'model.stl')
+    for name in ['mount', 'objectives', 'weirdmount']:
+        stagemap.add_cad_model(name, mesh_path, (1, 0, 0, 'x', 0, 1, 0, 'y', 0, 0, 1, 'z', 0, 0, 0, 1))
+
+    def move_stage():
+        stagemap.stage_position = {**stagemap.stage_position, 'x': stagemap.stage_position['x'] + 1}
+        stagemap.draw_tiles()
+
+    print(f'{"tiles":>8} {"GLBoxItem per tile":>20} {"line item":>12} {"position only":>14}')
+    for side in [10, 40, 100, 200, 400]:
+        stagemap.scanning_volume = {'x': 20 * side, 'y': 20 * side, 'z': 50}
+        # One GLBoxItem per tile becomes too slow to time past a few thousand tiles
+        box_time = f'{timed(box_item_draw_tiles, stagemap, [], repeat=1) * 1e3:.1f} ms' if side <= 40 else '-'
+        stagemap._tiles_geometry_key = None  # Force rebuild of tile geometry
+        line_time = timed(stagemap.draw_tiles, repeat=1)
+        move_time = timed(move_stage)
+        print(f'{side * side:>8} {box_time:>20} {line_time * 1e3:>9.1f} ms {move_time * 1e3:>11.2f} ms')
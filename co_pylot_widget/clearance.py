@@ -0,0 +1,264 @@
+import numpy as np
+
+EPS = 1e-12
+LEAF_SIZE = 4  # Triangles per leaf of bounding volume hierarchy
+LEAF_CHUNK = 1024  # Leaf pairs whose triangles are compared at once
+FRONT_CHUNK = 1024  # Node pairs descended together
+
+
+def morton_codes(points):
+    """Morton code of points so sorting them orders points along a z-order curve and keeps nearby points together
+    :param points: (N, 3) array
+    :return: (N,) uint64 array of 30 bit codes"""
+
+    lower = points.min(axis=0)
+    extent = float((points.max(axis=0) - lower).max()) or 1.0
+    quantized = ((points - lower) / extent * 1023).astype(np.uint64)
+    codes = np.zeros(len(points), dtype=np.uint64)
+    for bit in range(10):
+        for axis in range(3):
+            codes |= ((quantized[:, axis] >> np.uint64(bit)) & np.uint64(1)) << np.uint64(3 * bit + axis)
+    return codes
+
+
+class BVH:
+
+    def __init__(self, vertexes, faces, leaf_size: int = LEAF_SIZE):
+        """Bounding volume hierarchy of the triangles of a mesh in model space. Triangles are sorted along a z-order curve
+        of their centroids and grouped into leaves of leaf_size triangles. Leaves form a complete binary tree stored as
+        one array of axis aligned boxes per level so queries descend all nodes of a level in one numpy call
+        :param vertexes: (V, 3) array of vertices
+        :param faces: (N, 3) array of faces indexing vertexes
+        :param leaf_size: number of triangles per leaf"""
+
+        triangles = np.asarray(vertexes, dtype=np.float32)[np.asarray(faces)]
+        if not len(triangles):
+            raise ValueError('BVH needs at least one triangle')
+        order = np.argsort(morton_codes(triangles.mean(axis=1)), kind='stable')
+        self.n_leaves = -(-len(order) // leaf_size)
+        # Last leaf is filled up by repeating the last triangle
+        order = np.concatenate([order, np.full(self.n_leaves * leaf_size - len(order), order[-1])])
+        self.leaf_size = leaf_size
+        self.face_index = order  # Index in faces of every sorted triangle
+        self.triangles = triangles[order].reshape(self.n_leaves, leaf_size, 3, 3)
+        self.points = self.triangles[:, 0, 0]  # A vertex of every leaf to bound distances from above
+
+        # Leaf boxes are padded to a power of two by repeating the last leaf
+        self.depth = int(np.ceil(np.log2(self.n_leaves))) if self.n_leaves > 1 else 0
+        corners = self.triangles.reshape(self.n_leaves, -1, 3)
+        lower, upper = corners.min(axis=1), corners.max(axis=1)
+        padding = 2 ** self.depth - self.n_leaves
+        lower = np.concatenate([lower, np.repeat(lower[-1:], padding, axis=0)])
+        upper = np.concatenate([upper, np.repeat(upper[-1:], padding, axis=0)])
+        self.lower, self.upper = [lower], [upper]
+        while len(self.lower[0]) > 1:
+            self.lower.insert(0, self.lower[0].reshape(-1, 2, 3).min(axis=1))
+            self.upper.insert(0, self.upper[0].reshape(-1, 2, 3).max(axis=1))
+
+    def leaves(self, level: int, nodes):
+        """First leaf below nodes of level"""
+
+        return np.minimum(nodes * 2 ** (self.depth - level), self.n_leaves - 1)
+
+
+def transform_points(points, matrix):
+    """Apply 4x4 transform matrix to (..., 3) array of points"""
+
+    return points @ matrix[:3, :3].T + matrix[:3, 3]
+
+
+def transform_boxes(lower, upper, matrix):
+    """Axis aligned boxes enclosing boxes transformed by a 4x4 matrix
+    :return: lower and upper corners of transformed boxes"""
+
+    center = transform_points((lower + upper) / 2, matrix)
+    half = (upper - lower) / 2 @ np.abs(matrix[:3, :3]).T
+    return center - half, center + half
+
+
+def box_distances(lower_a, upper_a, lower_b, upper_b):
+    """Distance between pairs of axis aligned boxes. Overlapping boxes have distance 0"""
+
+    gap = np.maximum(np.maximum(lower_a - upper_b, lower_b - upper_a), 0)
+    return np.sqrt(np.einsum('ij,ij->i', gap, gap))
+
+
+def dot(a, b):
+    return np.einsum('...i,...i->...', a, b)
+
+
+def segment_distances(start_a, end_a, start_b, end_b):
+    """Closest points between pairs of segments
+    :return: distances and closest points on segments a and b"""
+
+    direction_a, direction_b, offset = end_a - start_a, end_b - start_b, start_a - start_b
+    a, e = dot(direction_a, direction_a), dot(direction_b, direction_b)
+    b, c, f = dot(direction_a, direction_b), dot(direction_a, offset), dot(direction_b, offset)
+    denominator = a * e - b * b
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Closest point of infinite lines clamped to segment a, then clamped to segment b and a again
+        s = np.where(denominator > EPS * a * e, np.clip((b * f - c * e) / denominator, 0, 1), 0)
+        t = np.where(e > EPS, (b * s + f) / e, 0)
+        clamped = np.clip(t, 0, 1)
+        s = np.where((t != clamped) & (a > EPS), np.clip((b * clamped - c) / a, 0, 1), s)
+        s = np.where((e <= EPS) & (a > EPS), np.clip(-c / a, 0, 1), s)
+    closest_a = start_a + direction_a * s[:, None]
+    closest_b = start_b + direction_b * clamped[:, None]
+    return np.linalg.norm(closest_a - closest_b, axis=1), closest_a, closest_b
+
+
+def project_to_triangles(points, triangles):
+    """Project points onto planes of triangles
+    :return: projected points and whether they lie inside triangles"""
+
+    origin, edge_b, edge_c = triangles[:, 0], triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0]
+    offset = points - origin
+    d00, d01, d11 = dot(edge_b, edge_b), dot(edge_b, edge_c), dot(edge_c, edge_c)
+    d20, d21 = dot(offset, edge_b), dot(offset, edge_c)
+    denominator = d00 * d11 - d01 * d01
+    with np.errstate(all='ignore'):  # Degenerate triangles give nan and are never inside
+        v = (d11 * d20 - d01 * d21) / denominator
+        w = (d00 * d21 - d01 * d20) / denominator
+        inside = (denominator > EPS * d00 * d11) & (v >= 0) & (w >= 0) & (v + w <= 1)
+        return origin + edge_b * v[:, None] + edge_c * w[:, None], inside
+
+
+def segment_triangle_intersections(start, end, triangles):
+    """Intersections of segments with triangles
+    :return: whether segments cross triangles and the crossing points"""
+
+    direction = end - start
+    edge_b, edge_c = triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0]
+    h = np.cross(direction, edge_c)
+    determinant = dot(edge_b, h)
+    offset = start - triangles[:, 0]
+    q = np.cross(offset, edge_b)
+    with np.errstate(all='ignore'):  # Segments parallel to triangles give nan and never hit
+        u = dot(offset, h) / determinant
+        v = dot(direction, q) / determinant
+        t = dot(edge_c, q) / determinant
+        hit = (np.abs(determinant) > EPS) & (u >= 0) & (v >= 0) & (u + v <= 1) & (t >= 0) & (t <= 1)
+        return hit, start + direction * np.where(hit, t, 0)[:, None]
+
+
+def triangle_distances(triangles_a, triangles_b):
+    """Minimum distance between pairs of triangles as the smallest of edge to edge and vertex to face distances.
+    Intersecting triangles have distance 0
+    :param triangles_a: (M, 3, 3) array of triangle corners
+    :param triangles_b: (M, 3, 3) array of triangle corners
+    :return: (M,) distances and (M, 3) closest points on triangles a and b"""
+
+    distances = np.full(len(triangles_a), np.inf)
+    closest_a, closest_b = triangles_a[:, 0].copy(), triangles_b[:, 0].copy()
+
+    def closer(distance, point_a, point_b):
+        mask = distance < distances
+        distances[mask], closest_a[mask], closest_b[mask] = distance[mask], point_a[mask], point_b[mask]
+
+    for i in range(3):
+        for j in range(3):
+            closer(*segment_distances(triangles_a[:, i], triangles_a[:, (i + 1) % 3],
+                                      triangles_b[:, j], triangles_b[:, (j + 1) % 3]))
+    for i in range(3):
+        projected, inside = project_to_triangles(triangles_a[:, i], triangles_b)
+        closer(np.where(inside, np.linalg.norm(projected - triangles_a[:, i], axis=1), np.inf),
+               triangles_a[:, i], projected)
+        projected, inside = project_to_triangles(triangles_b[:, i], triangles_a)
+        closer(np.where(inside, np.linalg.norm(projected - triangles_b[:, i], axis=1), np.inf),
+               projected, triangles_b[:, i])
+    for i in range(3):
+        hit, point = segment_triangle_intersections(triangles_a[:, i], triangles_a[:, (i + 1) % 3], triangles_b)
+        closer(np.where(hit, 0, np.inf), point, point)
+        hit, point = segment_triangle_intersections(triangles_b[:, i], triangles_b[:, (i + 1) % 3], triangles_a)
+        closer(np.where(hit, 0, np.inf), point, point)
+    return distances, closest_a, closest_b
+
+
+def leaf_distances(bvh_a: BVH, matrix_a, bvh_b: BVH, matrix_b, leaf_pairs, bounds, limit: float):
+    """Minimum distance between triangles of pairs of leaves. Leaf pairs are compared in order of their bounds in
+    chunks and pairs whose bound exceeds the closest distance found so far are skipped
+    :param leaf_pairs: (P, 2) array of leaf of a and leaf of b
+    :param bounds: (P,) lower bounds of distance of leaf pairs
+    :param limit: only distances up to limit are searched
+    :return: distance and (2, 3) array of closest points or inf and None if no pair is within limit"""
+
+    order = np.argsort(bounds)
+    leaf_pairs, bounds = leaf_pairs[order], bounds[order]
+    best, closest = np.inf, None
+    for start in range(0, len(leaf_pairs), LEAF_CHUNK):
+        chunk = leaf_pairs[start:start + LEAF_CHUNK][bounds[start:start + LEAF_CHUNK] <= min(best, limit)]
+        if not len(chunk):
+            break
+        triangles_a = transform_points(bvh_a.triangles[chunk[:, 0]].astype(float), matrix_a)
+        triangles_b = transform_points(bvh_b.triangles[chunk[:, 1]].astype(float), matrix_b)
+        # Every triangle of leaf a against every triangle of leaf b
+        triangles_a = np.repeat(triangles_a, bvh_b.leaf_size, axis=1).reshape(-1, 3, 3)
+        triangles_b = np.tile(triangles_b, (1, bvh_a.leaf_size, 1, 1)).reshape(-1, 3, 3)
+        # Skip triangle pairs whose boxes are further apart than the closest pair so far
+        near = box_distances(triangles_a.min(axis=1), triangles_a.max(axis=1),
+                             triangles_b.min(axis=1), triangles_b.max(axis=1)) <= min(best, limit)
+        if not near.any():
+            continue
+        distances, closest_a, closest_b = triangle_distances(triangles_a[near], triangles_b[near])
+        i = int(np.argmin(distances))
+        if distances[i] < best and distances[i] <= limit:
+            best, closest = float(distances[i]), np.stack([closest_a[i], closest_b[i]])
+        if best == 0:
+            break
+    return best, closest
+
+
+def clearance(bvh_a: BVH, matrix_a, bvh_b: BVH, matrix_b, cutoff: float = np.inf):
+    """Minimum distance between two meshes placed by model transforms. Both hierarchies are descended a level at a time
+    keeping only node pairs whose boxes may be closer than the closest pair found so far. Node pairs with the smallest
+    bounds are descended to the leaves first so the distances of their triangles prune the remaining pairs
+    :param matrix_a: 4x4 transform matrix of model a e.g. from model_transform_matrix
+    :param matrix_b: 4x4 transform matrix of model b
+    :param cutoff: stop once meshes are known to be further apart than cutoff
+    :return: distance and (2, 3) array of closest points on a and b. Distance is 0 if meshes intersect. If meshes are
+    further apart than cutoff, cutoff and None"""
+
+    matrix_a, matrix_b = np.asarray(matrix_a, dtype=float).reshape(4, 4), np.asarray(matrix_b, dtype=float).reshape(4, 4)
+    upper = np.inf  # Distance of closest vertices of node pairs
+    best, closest = np.inf, None
+    stack = [(0, 0, np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.int64))]
+    while stack:
+        level_a, level_b, nodes_a, nodes_b = stack.pop()
+        lower_a, upper_a = transform_boxes(bvh_a.lower[level_a][nodes_a], bvh_a.upper[level_a][nodes_a], matrix_a)
+        lower_b, upper_b = transform_boxes(bvh_b.lower[level_b][nodes_b], bvh_b.upper[level_b][nodes_b], matrix_b)
+        bounds = box_distances(lower_a, upper_a, lower_b, upper_b)
+        # Vertices of the meshes below each node pair bound the distance from above
+        points_a = transform_points(bvh_a.points[bvh_a.leaves(level_a, nodes_a)], matrix_a)
+        points_b = transform_points(bvh_b.points[bvh_b.leaves(level_b, nodes_b)], matrix_b)
+        upper = min(upper, float(np.linalg.norm(points_a - points_b, axis=1).min()))
+        keep = bounds <= min(upper, best, cutoff)
+        nodes_a, nodes_b, bounds = nodes_a[keep], nodes_b[keep], bounds[keep]
+        if not len(bounds):
+            continue
+
+        descend_a, descend_b = level_a < bvh_a.depth, level_b < bvh_b.depth
+        if not descend_a and not descend_b:
+            # Padding leaves repeat the last leaf so duplicate pairs are dropped
+            leaf_pairs, index = np.unique(np.stack([np.minimum(nodes_a, bvh_a.n_leaves - 1),
+                                                    np.minimum(nodes_b, bvh_b.n_leaves - 1)], axis=1),
+                                          axis=0, return_index=True)
+            distance, points = leaf_distances(bvh_a, matrix_a, bvh_b, matrix_b, leaf_pairs, bounds[index],
+                                              min(best, cutoff))
+            if distance < best:
+                best, closest = distance, points
+            if best == 0:
+                break
+            continue
+        if descend_a:
+            nodes_a, nodes_b, bounds = (nodes_a[:, None] * 2 + [0, 1]).ravel(), np.repeat(nodes_b, 2), np.repeat(bounds, 2)
+            level_a += 1
+        if descend_b:
+            nodes_b, nodes_a, bounds = (nodes_b[:, None] * 2 + [0, 1]).ravel(), np.repeat(nodes_a, 2), np.repeat(bounds, 2)
+            level_b += 1
+        # Split wide fronts so pairs with the smallest bounds of their parents are searched first
+        order = np.argsort(bounds, kind='stable')[::-1]
+        for chunk in np.array_split(order, -(-len(order) // FRONT_CHUNK)):
+            stack.append((level_a, level_b, nodes_a[chunk[::-1]], nodes_b[chunk[::-1]]))
+    if closest is None:
+        return cutoff, None
+    return best, closest
@@ -0,0 +1,93 @@
+import numpy as np
+
+MAP_AXES = ['x', 'y', 'z']
+
+
+class CoordinateTransform:
+
+    def __init__(self, coordinate_transformation_map: dict):
+        """Coordinate transformation map compiled into a signed permutation matrix between the stage axes it references
+        and the map x, y, z axes. Stage axes not referenced by the map are passed through unchanged.
+        :param coordinate_transformation_map: how stage coordinates translate to the GLViewWidget coordinate system
+        e.g. {x:-y, y:z, z:x}"""
+
+        if 'x' not in coordinate_transformation_map.keys() or 'y' not in coordinate_transformation_map.keys() \
+                or 'z' not in coordinate_transformation_map.keys():
+            raise KeyError
+        self.coordinate_transformation_map = dict(coordinate_transformation_map)
+        # Stage axes referenced by map in alphabetical order. Columns of matrix refer to these axes
+        self.stage_axes = sorted(coordinate_transformation_map[k].lstrip('-') for k in MAP_AXES)
+        self.matrix = np.zeros((3, 3))
+        for i, k in enumerate(MAP_AXES):
+            v = coordinate_transformation_map[k]
+            self.matrix[i, self.stage_axes.index(v.lstrip('-'))] = -1 if v.startswith('-') else 1
+        self.permutation = np.abs(self.matrix)
+        # Stage axis to map axis and polarity
+        self.stage_to_map_axes = {self.stage_axes[j]: (MAP_AXES[i], int(self.matrix[i, j])) for i, j in
+                                  zip(*np.nonzero(self.matrix))}
+
+    def passthrough_name(self, stage_axis: str):
+        """Map coordinate system name of a stage axis not referenced by the coordinate transformation map. Stage axis
+        named x, y, z that does not correlate to map x, y, z gets a trailing 0 e.g. x0"""
+
+        return stage_axis + '0' if stage_axis in MAP_AXES else stage_axis
+
+    def stage_axis_in_map(self, stage_axis: str):
+        """Name and polarity of a stage axis in the map coordinate system"""
+
+        if stage_axis in self.stage_to_map_axes:
+            return self.stage_to_map_axes[stage_axis]
+        return self.passthrough_name(stage_axis), 1
+
+    def stage_vector(self, stage_values: dict, default=0):
+        """Values of stage axes referenced by map as array ordered as stage_axes"""
+
+        return np.array([stage_values.get(k, default) for k in self.stage_axes], dtype=float)
+
+    def stage_to_map(self, points):
+        """Transform points from stage to map coordinate system
+        :param points: (..., 3) array with last axis ordered as stage_axes
+        :return: (..., 3) array with last axis ordered as map x, y, z"""
+
+        return np.asarray(points) @ self.matrix.T
+
+    def map_to_stage(self, points):
+        """Transform points from map to stage coordinate system
+        :param points: (..., 3) array with last axis ordered as map x, y, z
+        :return: (..., 3) array with last axis ordered as stage_axes"""
+
+        return np.asarray(points) @ self.matrix
+
+    def stage_to_map_bounds(self, lower, upper):
+        """Transform boxes or limit pairs from stage to map coordinate system. Since axes may flip polarity, the
+        transformed corners are sorted so lower stays lower
+        :param lower: (..., 3) array of lower corners ordered as stage_axes
+        :param upper: (..., 3) array of upper corners ordered as stage_axes
+        :return: lower and upper (..., 3) arrays ordered as map x, y, z"""
+
+        lower, upper = self.stage_to_map(lower), self.stage_to_map(upper)
+        return np.minimum(lower, upper), np.maximum(lower, upper)
+
+    def stage_to_map_dict(self, stage_values: dict):
+        """Remap a dictionary of values from stage to map coordinate system. Values can be numbers or limit pairs.
+        The given dictionary is not changed"""
+
+        map_values = {}
+        for k, v in stage_values.items():
+            axis, polarity = self.stage_axis_in_map(k)
+            map_values[axis] = sorted(polarity * i for i in v) if type(v) is list else polarity * v
+        return map_values
+
+    def map_to_stage_dict(self, map_values: dict):
+        """Remap a dictionary of values from map to stage coordinate system. The given dictionary is not changed"""
+
+        map_to_stage_axes = {axis: (stage_axis, polarity) for stage_axis, (axis, polarity) in
+                             self.stage_to_map_axes.items()}
+        stage_values = {}
+        for k, v in map_values.items():
+            if k in map_to_stage_axes:
+                axis, polarity = map_to_stage_axes[k]
+            else:  # Strip trailing 0 from passed through stage axis named x, y, z
+                axis, polarity = k[:-1] if k[:-1] in MAP_AXES and k.endswith('0') else k, 1
+            stage_values[axis] = sorted(polarity * i for i in v) if type(v) is list else polarity * v
+        return stage_values
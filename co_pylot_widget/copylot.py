@@ -1,30 +1,66 @@
-from qtpy.QtCore import Signal, Slot
-from qtpy.QtWidgets import QWidget, QVBoxLayout, QCheckBox, QComboBox, QPushButton, QLineEdit, QHBoxLayout
+from qtpy.QtCore import Signal, Slot, QTimer, QEvent
+from qtpy.QtWidgets import QWidget, QVBoxLayout, QCheckBox, QComboBox, QPushButton, QLineEdit, QHBoxLayout, QLabel
 import pyqtgraph.opengl as gl
-from co_pylot_widget.signalchangevar import SignalChangeVar
+from co_pylot_widget.framevar import FrameVar
+from co_pylot_widget.orientation import CompiledOrientation
+from co_pylot_widget.coordinates import CoordinateTransform
+from co_pylot_widget.engine import GeometryEngine
+from co_pylot_widget.clearance import clearance
+from co_pylot_widget.meshdata import CachedMeshData
+from co_pylot_widget.tiling import box_edge_vertices
+from co_pylot_widget.instrumentation import Instrumentation, format_stats
+from co_pylot_widget.points import KDTree, PointSet
+from co_pylot_widget.trail import Trail
+from co_pylot_widget.recording import ATTRIBUTES, Recorder
 from pyqtgraph.Qt import QtGui
-import numpy as np
 import qtpy.QtGui
-import stl
-from math import ceil
-from sympy import symbols
-from sympy.parsing.sympy_parser import parse_expr
+import numpy as np
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from time import perf_counter
+
+MODEL_COLOR = (0.5, 0.5, 0.5, 0.5)
+CLEARANCE_VIOLATION_COLOR = (1, 0.2, 0.2, 0.6)
+
+
+def _stop_background_work(lock, closed, executors):
+    """Stop background work of a widget. Kept outside the widget so it can run while the widget is destroyed
+    :param lock: lock held while signals of background work are emitted
+    :param closed: event set to stop signals from being emitted
+    :param executors: executors to shut down"""
+
+    with lock:
+        closed.set()
+    for executor in executors:
+        executor.shutdown(wait=False, cancel_futures=True)
 
 
 class CoPylot(QWidget):
-    stage_position = SignalChangeVar()
-    scanning_volume = SignalChangeVar()
-    limits = SignalChangeVar()
-    fov = SignalChangeVar()
-    tile_overlap_pct = SignalChangeVar()
+    stage_position = FrameVar()
+    scanning_volume = FrameVar()
+    limits = FrameVar()
+    fov = FrameVar()
+    tile_overlap_pct = FrameVar()
     valueChanged = Signal((int,))
+    modelLoaded = Signal(str)
+    modelLoadFailed = Signal(str, str)
+    modelLoadProgress = Signal(int, int)
+    _stagePositionPushed = Signal()
+    _attributePushed = Signal(str, object)
+    _meshLoaded = Signal(str, object)
+    _clearanceChecked = Signal(object)
+    clearanceViolated = Signal(str, str, float)
 
     def __init__(self, stage_position: dict,
                  coordinate_transformation_map: dict,
                  scanning_volume: dict,
                  limits: dict,
                  fov: dict,
-                 tile_overlap_pct: dict):
+                 tile_overlap_pct: dict,
+                 max_refresh_rate: float = 60,
+                 mesh_cache_dir: str = None,
+                 instrumentation: bool = False):
         """Widget to visualize current stage position, imaging volume, tiles ect. in relation to stage hardware
          :param stage_position: position of stage in stage coordinate system e.g. {x:10, y:10, z:10}
          :param coordinate_transform: how stage coordinates translate to the GLViewWidget corrdinate system.
@@ -35,9 +71,21 @@ class CoPylot(QWidget):
          e.g. {x:[-100, 100], y:[-100, 100], z:[-100, 100]
          :param fov: Size of camera fov in stage coordinate system to correctly draw on map e.g. {x:2304, y:1152}
          :param tile_overlap_pct: Defines how much overlap between tiles in stage coordinate system e.g. {x:15, y:15},
+         :param max_refresh_rate: maximum rate in Hz the map is redrawn at. Changes arriving faster are coalesced into
+         one update using the latest values. None redraws as soon as the event loop is free
+         :param mesh_cache_dir: directory where parsed stl files are cached. Defaults to CO_PYLOT_CACHE_DIR environment
+         variable or ~/.cache/co-pylot-widget
+         :param instrumentation: time map updates, tile rebuilds, mesh loads and paints. See stats. Can be toggled later
+         with instrumentation.enabled
           """
         super().__init__()
 
+        self.instrumentation = Instrumentation(instrumentation)
+        self._update_arrived = None  # Time oldest update not yet drawn arrived
+        self._render_pending = None  # Arrival time of update drawn but not yet painted
+        self._stats_overlay = None
+        self.engine = GeometryEngine(coordinate_transformation_map, mesh_cache_dir)  # Geometry without Qt
+        self.mesh_cache = self.engine.mesh_cache
         self._set_coordinate_transformation_map(coordinate_transformation_map)
         self.stage_position = stage_position
         self.scanning_volume = scanning_volume
@@ -45,13 +93,56 @@ class CoPylot(QWidget):
         self.fov = fov
         self.tile_overlap_pct = tile_overlap_pct
         self._cad_models = {}
-
-        self.tiles = []
+        self._drawn_stage_position = {}  # Stage position models were last transformed to
+        self._mesh_data = {}  # MeshData shared by models using the same stl file
+        self._model_loader = ThreadPoolExecutor(max_workers=4, thread_name_prefix='co-pylot-model-loader')
+        self._clearance_worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix='co-pylot-clearance')
+        self._closed = threading.Event()  # Set once background work is stopped so no more signals are emitted
+        self._background_lock = threading.Lock()
+        self.destroyed.connect(partial(_stop_background_work, self._background_lock, self._closed,
+                                       [self._model_loader, self._clearance_worker]))
+        self._loading_models = {}  # Models being loaded in background and their future and orientation
+        self._models_requested = 0
+        self._models_finished = 0
+        self.lod_distance = 4  # Cad models are drawn at full detail when camera is within this many model radii
+        self._clearance_checks = {}  # Pairs of model names and their threshold, distance, closest points and sequence
+        self._clearance_pending = set()  # Checks to compute once the running check finishes
+        self._clearance_running = False
+        self._clearance_sequence = 0  # Number of clearance computations started. Older results are not applied
+        self.points = PointSet(sorted(set(self.stage_position) | set(self._coordinate_transform.stage_axes)))
+        self._points_tree = None  # KDTree of map positions of points built when first queried
+        self._labels_tree = None  # KDTree of map positions of labeled points built when labels are next drawn
+        self.max_point_labels = 50  # Only labels of this many points closest to the camera center are drawn
+        self.max_visible_tiles = 100000  # Scans with more tiles are drawn as boxes of merged neighbouring tiles
+        self.trail = None  # Trajectory of stage recorded while trail is shown
+        self._trail_changed = False
+        self.recorder = None  # Recorder logging stage positions and attribute changes while recording
 
         # TODO: Add checks so fov and tile overlap have same values
 
-        # Trigger the update of map when SignalChangeVar variable has changed
-        self.valueChanged[int].connect(self.update_map)
+        # Coalesce changes into one map update per refresh interval
+        self.updates_received = 0
+        self.updates_rendered = 0
+        self._update_pending = False
+        self._last_update = 0
+        self._pushed_stage_position = None
+        self._push_lock = threading.Lock()
+        self._update_timer = QTimer(self)
+        self._update_timer.setSingleShot(True)
+        self._update_timer.timeout.connect(self._flush_updates)
+        self._set_max_refresh_rate(max_refresh_rate)
+
+        # Trigger the update of map when FrameVar variable has changed or position is pushed from a thread
+        self.valueChanged[int].connect(self.request_update)
+        self._stagePositionPushed.connect(self._schedule_update)
+        self._attributePushed.connect(self._set_attribute)
+        self._meshLoaded.connect(self._finish_model_load)
+        self._clearanceChecked.connect(self._finish_clearance)
+        self._lod_timer = QTimer(self)
+        self._lod_timer.setSingleShot(True)
+        self._lod_timer.setInterval(50)
+        self._lod_timer.timeout.connect(self.update_lod)
+        self._lod_timer.timeout.connect(self.update_point_labels)
 
         # Create map
         self.plot = self.create_map()
@@ -67,52 +158,177 @@ class CoPylot(QWidget):
         return self._coordinate_transformation_map
 
     def _set_coordinate_transformation_map(self, value: dict):
-        if 'x' not in value.keys() or 'y' not in value.keys() or 'z' not in value.keys():
-            raise KeyError
-        try:
-            self.transform_variables()
-        except AttributeError:
-            pass
+        previous = getattr(self, '_coordinate_transform', None)
+        self.engine.coordinate_transformation_map = value  # Recompiles orientations for new transform
+        self._coordinate_transform = self.engine.coordinate_transform
         self._coordinate_transformation_map = value
+        self.transform_variables()
+        for name, model in getattr(self, '_cad_models', {}).items():
+            model[2] = self.engine.models[name][1]
+            model[0].setTransform(self.model_transform_matrix(model[2]))
+        if getattr(self, '_clearance_checks', None):
+            self.check_clearance()
+        if getattr(self, 'points_item', None) is not None:
+            self._draw_points()
+        if getattr(self, 'trail', None) is not None:
+            with self._push_lock:
+                if previous.stage_axes == self._coordinate_transform.stage_axes:
+                    self.trail.transform(self._coordinate_transform.matrix @ previous.matrix.T)
+                else:
+                    self.trail.clear()
+                self._trail_changed = True
         self.valueChanged.emit(0)  # Trigger update of map if coordinate transform changed
 
+    def _get_max_refresh_rate(self):
+        return self._max_refresh_rate
+
+    def _set_max_refresh_rate(self, value: float):
+        if value is not None and value <= 0:
+            raise ValueError('max_refresh_rate must be positive or None')
+        self._max_refresh_rate = value
+        self._min_update_interval = 0 if value is None else 1 / value
+
+    def push_stage_position(self, stage_position: dict):
+        """Thread safe way to give a new stage position in stage coordinate system. Positions pushed between map updates
+        are merged and only the latest values are drawn on the next update. Can be called from any thread
+        :param stage_position: position of stage in stage coordinate system e.g. {x:10, y:10, z:10}"""
+
+        with self._push_lock:
+            self.updates_received += 1
+            if self.instrumentation.enabled and self._update_arrived is None:
+                self._update_arrived = perf_counter()
+            first_push = self._pushed_stage_position is None
+            self._pushed_stage_position = {**(self._pushed_stage_position or {}), **stage_position}
+            if self.trail is not None:
+                transform = self._coordinate_transform
+                position = transform.stage_vector({**self.stage_position, **self._pushed_stage_position})
+                self._trail_changed |= self.trail.append(transform.stage_to_map(position))
+            if self.recorder is not None:
+                self.recorder.record_position(stage_position)
+        if first_push:
+            self._stagePositionPushed.emit()  # Queued to gui thread when called from other thread
+
+    @Slot(int)
+    def request_update(self, *args):
+        """Mark map as needing an update. Map is updated at most once per refresh interval"""
+
+        with self._push_lock:
+            self.updates_received += 1
+            if self.instrumentation.enabled and self._update_arrived is None:
+                self._update_arrived = perf_counter()
+            if self.trail is not None:
+                position = self._stage_position.map
+                self._trail_changed |= self.trail.append([position.get(k, 0) for k in ['x', 'y', 'z']])
+            if self.recorder is not None:
+                self.recorder.record_changes(self._recorded_values())
+        self._schedule_update()
+
+    def push_attribute(self, name: str, value: dict):
+        """Thread safe way to set fov, scanning_volume, limits, tile_overlap_pct or coordinate_transformation_map. The
+        value is set in the gui thread. Can be called from any thread
+        :param name: name of attribute
+        :param value: value of attribute in stage coordinate system"""
+
+        if name not in ATTRIBUTES:
+            raise ValueError(f'{name} is not one of {ATTRIBUTES}')
+        self._attributePushed.emit(name, value)  # Queued to gui thread when called from other thread
+
+    @Slot(str, object)
+    def _set_attribute(self, name: str, value: dict):
+        setattr(self, name, value)
+
+    @Slot()
+    def _schedule_update(self):
+        """Start timer to update map if an update is not already scheduled"""
+
+        self._update_pending = True
+        if not self._update_timer.isActive():
+            wait = self._min_update_interval - (perf_counter() - self._last_update)
+            self._update_timer.start(max(0, int(wait * 1000)))
+
+    @Slot()
+    def _flush_updates(self):
+        """Apply latest pushed stage position and update map"""
+
+        with self._push_lock:
+            pushed, self._pushed_stage_position = self._pushed_stage_position, None
+        if pushed is not None:
+            self._stage_position.update(pushed, emit=False)
+        if self._update_pending or pushed is not None:
+            self._update_pending = False
+            self._last_update = perf_counter()
+            self.update_map()
+            self.updates_rendered += 1
+            with self._push_lock:
+                if self._render_pending is None:
+                    self._render_pending = self._update_arrived
+                self._update_arrived = None
+
+    @Slot()
+    def _frame_swapped(self):
+        """Record paint of map and latency of updates drawn since last paint"""
+
+        if self.instrumentation.enabled:
+            self.instrumentation.record_frame()
+            if self._render_pending is not None:
+                self.instrumentation.record_latency(perf_counter() - self._render_pending)
+        self._render_pending = None
+
+    def stats(self):
+        """Performance statistics recorded while instrumentation is enabled
+        :return: dictionary of timers of map update steps, tile rebuilds and mesh loads, stage update to paint latency
+        and its histogram in ms, paint fps and update counts"""
+
+        return {**self.instrumentation.stats(),
+                'updates_received': self.updates_received,
+                'updates_rendered': self.updates_rendered}
+
+    def show_stats_overlay(self, visible: bool = True):
+        """Show live stats as text over map. Showing the overlay enables instrumentation
+        :param visible: show or hide overlay"""
+
+        if self._stats_overlay is None:
+            self._stats_overlay = QLabel(self.plot)
+            self._stats_overlay.setStyleSheet('color: white; background-color: rgba(0, 0, 0, 128); '
+                                              'font-family: monospace; padding: 4px')
+            self._stats_timer = QTimer(self)
+            self._stats_timer.setInterval(500)
+            self._stats_timer.timeout.connect(self._update_stats_overlay)
+        if visible:
+            self.instrumentation.enabled = True
+            self._update_stats_overlay()
+            self._stats_timer.start()
+        else:
+            self._stats_timer.stop()
+        self._stats_overlay.setVisible(visible)
+
+    @Slot()
+    def _update_stats_overlay(self):
+        """Refresh text of stats overlay"""
+
+        self._stats_overlay.setText(format_stats(self.stats()))
+        self._stats_overlay.adjustSize()
+
     def transform_variables(self):  # TODO: better name and description and make private maybe?
-        """When new coordiante_transformation_map is given, update variables"""
+        """When new coordiante_transformation_map is given, update map coordinate system copy of variables"""
         variables = ['stage_position', 'scanning_volume', 'limits', 'fov', 'tile_overlap_pct']
         for value in variables:
-            stage_coords = self.map_to_stage_coord_transform(getattr(self, value))
-            setattr(self, value, stage_coords)
-            getattr(self, value).coord_sys = 'stage'
+            if f'_{value}' in self.__dict__:
+                getattr(self, f'_{value}').refresh()
 
     def coord_transform(self, transformation: dict, values: dict):
         """Transform a dictionary of values from one coordinate system to another"""
 
-        remap_values = {}
-        for k, v in transformation.items():
-            if v.lstrip('-') in values.keys():
-                polarity = -1 if '-' in v else 1
-                remap_values[k] = [i * polarity for i in values[v.lstrip('-')]] if type(values[v.lstrip('-')]) is list \
-                    else polarity * values[v.lstrip('-')]
-                if type(values[v.lstrip('-')]) is list:
-                    remap_values[k] = list(np.sort(remap_values[k]))
-                del values[v.lstrip('-')]
-        overlapped_keys = [k for k in values.keys() if k in remap_values.keys()]
-        for overlap in overlapped_keys: # Account for stage axis named x, y, z that does not correlate to map x, y, z
-            values[overlap+'0'] = values[overlap]
-            self._coordinate_transformation_map[overlap+'0'] = overlap
-            del values[overlap]
-        return {**remap_values, **values} # Add back in axes that aren't used in transformation
+        return CoordinateTransform(transformation).stage_to_map_dict(values)
 
     def stage_to_map_coord_transform(self, stage_values: dict):
         """Remap a dictionary of values from stage coordinate system to map coordinate system"""
-        return self.coord_transform(self._coordinate_transformation_map, stage_values)
+        return self.engine.stage_to_map(stage_values)
 
     def map_to_stage_coord_transform(self, map_values: dict):
         """Remap a dictionary of values from map coordinate system to stage coordinate system"""
 
-        map_to_stage = {v if '-' not in v else v.lstrip('-'): k if '-' not in v else '-' + k
-                        for k, v in self._coordinate_transformation_map.items()}
-        return self.coord_transform(map_to_stage, map_values)
+        return self.engine.map_to_stage(map_values)
 
     def create_point_widget(self):
         """Create widget to add points to graph"""
@@ -133,26 +349,143 @@ class CoPylot(QWidget):
         return point_widget
 
     def set_point(self):
-
         """Set current position as point on graph"""
 
-        # Remap sample_pos to gui coords and convert 1/10um to mm
-
-        position = [self.stage_position.get('x', 0), self.stage_position.get('y', 0), self.stage_position.get('z', 0)]
         hue = qtpy.QtGui.QColor(self.point_color.currentText())  # Color of point determined by drop down box
-        point = gl.GLScatterPlotItem(pos=position,
-                                     size=min([abs(.15*v) for v in self.fov.values()]),
-                                     color=hue,
-                                     pxMode=False)
         info = self.point_label.text()  # Text comes from textbox
-        info_point = gl.GLTextItem(pos=position,
-                                   text=info,
-                                   font=qtpy.QtGui.QFont('Helvetica', 15))
-        self.plot.addItem(info_point)  # Add items to plot
-        self.plot.addItem(point)
-
+        self.add_points([dict(self.stage_position)], colors=hue.getRgbF(), labels=[info])
         self.point_label.clear()  # Clear text box
 
+    def add_points(self, positions, colors=(1, 1, 1, 1), labels=''):
+        """Mark points on graph. All points are drawn by one item so thousands of points can be marked
+        :param positions: list of stage positions in stage coordinate system e.g. [{x:10, y:10, z:10}] or (N, A) array
+        with columns ordered as points.axes
+        :param colors: (N, 4) array of rgba colors from 0 to 1 or one color for all points
+        :param labels: list of labels or one label for all points
+        :return: indices of added points"""
+
+        start = len(self.points)
+        indices = self.points.add(positions, colors, labels)
+        self._draw_points(start)  # Only new points are transformed
+        return indices
+
+    def remove_points(self, indices):
+        """Remove marked points. Indices of points after removed points shift down
+        :param indices: indices of points to remove"""
+
+        self.points.remove(indices)
+        self._draw_points()
+
+    def nearest_points(self, stage_position: dict = None, k: int = 1):
+        """Marked points closest to a stage position
+        :param stage_position: position in stage coordinate system. Defaults to current stage position
+        :param k: number of points
+        :return: distances and indices of up to k nearest points sorted by distance"""
+
+        stage_position = self.stage_position if stage_position is None else stage_position
+        if self._points_tree is None:
+            self._points_tree = KDTree(self._point_map_positions)
+        point = self._coordinate_transform.stage_to_map(self._coordinate_transform.stage_vector(stage_position))
+        return self._points_tree.query(point, k)
+
+    def save_points(self, path: str):
+        """Save marked points in stage coordinate system to a .npz file"""
+
+        self.points.save(path)
+
+    def load_points(self, path: str):
+        """Replace marked points by points saved with save_points"""
+
+        self.points = PointSet.load(path)
+        self._draw_points()
+
+    def _draw_points(self, start: int = 0):
+        """Update point item after points or coordinate transform changed. Map positions are kept in a buffer that grows
+        like the point set so added points are transformed and appended without touching earlier points. Trees of
+        points and labels are rebuilt when next queried
+        :param start: index of first changed point. Map positions of earlier points are kept"""
+
+        count = len(self.points)
+        if len(self._point_map_buffer) < count:
+            grown = np.zeros((max(2 * len(self._point_map_buffer), count), 3))
+            grown[:start] = self._point_map_buffer[:start]
+            self._point_map_buffer = grown
+        self._point_map_buffer[start:count] = self._coordinate_transform.stage_to_map(
+            self.points.columns(self._coordinate_transform.stage_axes, start))
+        self._point_map_positions = self._point_map_buffer[:count]
+        self._points_size = min([abs(.15*v) for v in self._fov.map.values()])
+        self.points_item.setData(pos=self._point_map_positions, color=self.points.colors, size=self._points_size)
+        self._points_tree = None
+        self._labels_tree = None
+        self._lod_timer.start()  # Labels are redrawn once marking pauses
+
+    def update_point_labels(self):
+        """Draw labels of the labeled points closest to the camera center. Text items are reused between updates"""
+
+        if self._labels_tree is None:  # Built when first needed after points changed
+            self._labeled_points = np.flatnonzero(self.points.labels != '')
+            self._labels_tree = KDTree(self._point_map_positions[self._labeled_points])
+        center = self.plot.opts['center']
+        _, nearest = self._labels_tree.query([center.x(), center.y(), center.z()], self.max_point_labels)
+        for i in range(len(self._point_label_items), len(nearest)):
+            self._point_label_items.append(gl.GLTextItem(font=qtpy.QtGui.QFont('Helvetica', 15)))
+            self.plot.addItem(self._point_label_items[-1])
+        for item, point in zip(self._point_label_items, self._labeled_points[nearest]):
+            item.setData(pos=self._point_map_positions[point], text=str(self.points.labels[point]))
+            item.setVisible(True)
+        for item in self._point_label_items[len(nearest):]:
+            item.setVisible(False)
+
+    def show_trail(self, visible: bool = True, capacity: int = 10000, min_segment: float = 0):
+        """Draw trajectory of stage. Every stage position set or pushed while the trail is shown adds a segment. Hiding
+        the trail drops it
+        :param visible: show or hide trail
+        :param capacity: most segments kept. The oldest segments are dropped once full
+        :param min_segment: positions closer than this to the start of the newest segment extend it instead of adding a
+        segment"""
+
+        with self._push_lock:
+            self.trail = Trail(capacity, min_segment) if visible else None
+            if visible:
+                position = self._stage_position.map
+                self.trail.append([position.get(k, 0) for k in ['x', 'y', 'z']])
+            self._trail_changed = True
+        self.trail_item.setVisible(visible)
+
+    def start_recording(self, path):
+        """Log timestamped stage positions and changes of fov, scanning_volume, limits, tile_overlap_pct and
+        coordinate_transformation_map to a binary file until stop_recording. The current values are written first so
+        the recording can be replayed into a widget in any state. See recording.Replayer
+        :param path: file to write"""
+
+        self.stop_recording()
+        with self._push_lock:
+            self.recorder = Recorder(path)
+            self.recorder.record_changes(self._recorded_values())
+
+    def stop_recording(self):
+        """Stop recording and close the recording file"""
+
+        with self._push_lock:
+            recorder, self.recorder = self.recorder, None
+        if recorder is not None:
+            recorder.close()
+
+    def _recorded_values(self):
+        """Stage position including positions pushed but not yet drawn and recorded attributes in stage coordinate
+        system. Called with push lock held"""
+
+        return {'stage_position': {**self.stage_position, **(self._pushed_stage_position or {})},
+                **{name: getattr(self, name) for name in ATTRIBUTES}}
+
+    def _draw_trail(self):
+        """Hand segments of trail to line item if trail changed since last drawn"""
+
+        with self._push_lock:
+            changed, self._trail_changed = self._trail_changed, False
+        if changed and self.trail is not None:
+            self.trail_item.setData(pos=self.trail.segments())  # A view of the buffer so nothing is copied
+
     def create_tiling_widget(self):
         """Create checkbox widget to turn on and off tiling"""
 
@@ -167,57 +500,44 @@ class CoPylot(QWidget):
         # State is 2 if checkmark is pressed
         if state == 2:
             self.draw_tiles()
+            self.tiles.setVisible(True)
 
         # State is 0 if checkmark is unpressed
         if state == 0:
-            for item in self.tiles:
-                if item in self.plot.items:
-                    self.plot.removeItem(item)
-            self.tiles = []
+            self.tiles.setVisible(False)
 
     def draw_tiles(self):
-        """Draw tiles of proposed scan volume"""
-
-        # Remove old tiles
-        for item in self.tiles:
-            if item in self.plot.items:
-                self.plot.removeItem(item)
-        self.tiles.clear()
-
-        grid_step = {k: (1 - abs(self.tile_overlap_pct.get(k, 0)) / 100.0) * self.fov.get(k, 1) for k in
-                     ['x', 'y', 'z']}
-        steps = {k: 1 + ceil((self.scanning_volume.get(k, 0) - self.fov.get(k, self.scanning_volume.get(k, 0))) /
-                             grid_step.get(k, 0)) for k in ['x', 'y', 'z']}
-
-
-        steps_order_axes = sorted(steps.keys())  # alphabetical list of keys
-        for x in range(steps[steps_order_axes[0]]):  # refers to x axis
-            for y in range(steps[steps_order_axes[1]]):  # refers to y axis
-                for z in range(steps[steps_order_axes[2]]):  # refers to z axis
-                    current_tile = {'x': x, 'y': y, 'z': z}
-                    tile_offset = {k: (axis * grid_step[k]) - (.5 * self.fov.get(k, 0))
-                                   for k, axis in current_tile.items()}
-                    tile_pos = {k: v + self.stage_position[k] for k, v in tile_offset.items()}
-
-                    # num_pos = [tile_pos['x'],
-                    #            tile_pos['y'] + (.5 * 0.001 * (self.cfg.tile_specs['y_field_of_view'])),
-                    #            tile_pos['z'] - (.5 * 0.001 * (self.cfg.tile_specs['x_field_of_view']))]
-
-                    tile_volume = {k: self.fov.get(k, self.scanning_volume.get(k, 0)) for k in ['x', 'y', 'z']}
-                    box = gl.GLBoxItem()  # Representing scan volume
-                    box.translate(tile_pos['x'], tile_pos['y'], tile_pos['z'])
-                    box.setSize(**tile_volume)
-                    self.tiles.append(box)
-                    self.tiles[-1].setColor(qtpy.QtGui.QColor('cornflowerblue'))
-                    # Remove and add back cad models to see tiles through models
-                    self.remove_models_from_plot()
-                    self.plot.addItem(self.tiles[-1])
-                    self.add_models_to_plot()
-
-                    # self.tiles.append(gl.GLTextItem(pos=num_pos, text=str((self.xtiles*y)+x), font=qtpy.QtGui.QFont('Helvetica', 15)))
-                    # self.plot.addItem(self.tiles[-1])       # Can't draw text while moving graph
-
-    def add_cad_model(self, name: str, path: str, orientation):
+        """Draw tiles of proposed scan volume. All tiles are drawn as line segments of a single item whose geometry is
+        only rebuilt when fov, tile overlap, scanning volume or coordinate transform changes. Otherwise, the existing
+        grid is translated to the stage position. Scans of more than max_visible_tiles tiles are drawn as boxes of
+        merged neighbouring tiles"""
+
+        fov, tile_overlap_pct, scanning_volume = self.fov, self.tile_overlap_pct, self.scanning_volume
+        geometry_key = tuple(tuple(sorted(value.items())) for value in [fov,
+                                                                        tile_overlap_pct,
+                                                                        scanning_volume,
+                                                                        self._coordinate_transformation_map])
+        geometry_key += (self.max_visible_tiles,)
+        if geometry_key != self._tiles_geometry_key:
+            with self.instrumentation.timer('draw_tiles.rebuild'):
+                count, chunks = self.engine.tile_box_chunks(scanning_volume, fov, tile_overlap_pct,
+                                                            self.max_visible_tiles)
+                vertices = np.empty((24 * count, 3), dtype=np.float32)  # Filled chunk by chunk
+                start = 0
+                for lower, upper in chunks:
+                    end = start + 24 * len(lower)
+                    vertices[start:end] = box_edge_vertices(lower, upper - lower)
+                    start = end
+                self.tiles.setData(pos=vertices)
+                self._tiles_geometry_key = geometry_key
+
+        stage_position = self._stage_position.map
+        self.tiles.setTransform(qtpy.QtGui.QMatrix4x4(1, 0, 0, stage_position['x'],
+                                                      0, 1, 0, stage_position['y'],
+                                                      0, 0, 1, stage_position['z'],
+                                                      0, 0, 0, 1))
+
+    def add_cad_model(self, name: str, path: str, orientation, triangle_budget: int = 250000):
         """Add cad model and set proper orientation
         :param path: the path of the stl file
         :param  orientation: the QMatrix 4x4 that dictate how stl will move within the map. To specify movement with
@@ -225,48 +545,302 @@ class CoPylot(QWidget):
         accordingly e. g.  (1, 0, 0, 'x',
                             0, 1, 0, 'y',
                             0, 0, 1, 'z',
-                            0, 0, 0, 1) for model whose origin moves with stage position """
-
-        # Load in stl file
-        stl_mesh = stl.mesh.Mesh.from_file(path)
-        points = stl_mesh.points.reshape(-1, 3)
-        faces = np.arange(points.shape[0]).reshape(-1, 3)
-        cad_model = gl.GLMeshItem(meshdata=gl.MeshData(vertexes=points, faces=faces),
-                                  smooth=True, drawFaces=True, drawEdges=False, color=(0.5, 0.5, 0.5, 0.5),
+                            0, 0, 0, 1) for model whose origin moves with stage position
+        :param triangle_budget: number of faces of the first decimated level of detail. Models with more faces are drawn
+        decimated when the camera is far away. None always draws the full resolution """
+
+        # Load in stl file and levels of detail from cache
+        self._cancel_model_load(name)
+        self._add_mesh_item(name, self._load_mesh(path, triangle_budget), orientation)
+
+    def add_cad_model_async(self, name: str, path: str, orientation, triangle_budget: int = 250000):
+        """Add cad model without blocking the gui. The stl file is parsed in a background thread and the model is added
+        to the map in the gui thread once loaded. modelLoaded or modelLoadFailed is emitted with the name of the model
+        and modelLoadProgress with the number of finished and requested models
+        :param path: the path of the stl file
+        :param orientation: the QMatrix 4x4 that dictate how stl will move within the map. See add_cad_model
+        :param triangle_budget: number of faces of the first decimated level of detail. See add_cad_model"""
+
+        self._cancel_model_load(name)
+        bvh = any(name in pair for pair in self._clearance_checks)  # Build hierarchy next to load if it is checked
+        future = self._model_loader.submit(self._load_mesh, path, triangle_budget, bvh)
+        self._loading_models[name] = [future, orientation]
+        self._models_requested += 1
+        future.add_done_callback(partial(self._emit_mesh_loaded, name))
+
+    def add_cad_models(self, models, triangle_budget: int = 250000):
+        """Add several cad models in background threads. See add_cad_model_async
+        :param models: iterable of name, path and orientation of models e.g. [('mount', 'mount.stl', (1, 0, 0, 'x',
+                                                                                                   0, 1, 0, 'y',
+                                                                                                   0, 0, 1, 'z',
+                                                                                                   0, 0, 0, 1))]
+        :param triangle_budget: number of faces of the first decimated level of detail. See add_cad_model"""
+
+        for name, path, orientation in models:
+            self.add_cad_model_async(name, path, orientation, triangle_budget)
+
+    def _load_mesh(self, path: str, triangle_budget: int, bvh: bool = False):
+        """Load mesh and levels of detail from mesh cache. Safe to call from any thread
+        :param bvh: also build bounding volume hierarchy of mesh for clearance checks"""
+
+        with self.instrumentation.timer('mesh_load'):
+            mesh = self.mesh_cache.load_levels(path, triangle_budget)
+        if bvh:
+            with self.instrumentation.timer('bvh_build'):
+                self.engine.mesh_bvh(mesh[0], *mesh[1][0][:2])
+        return mesh
+
+    def _emit_mesh_loaded(self, name: str, future):
+        """Callback of background load. Runs in the loader thread so the signal is queued to the gui thread. Nothing is
+        emitted once the widget is shut down or destroyed"""
+
+        with self._background_lock:
+            if not self._closed.is_set():
+                self._meshLoaded.emit(name, future)
+
+    def shutdown(self):
+        """Stop loading models and checking clearance in background. Work not started is cancelled and results
+        finishing later are dropped. Called when the widget is destroyed"""
+
+        _stop_background_work(self._background_lock, self._closed, [self._model_loader, self._clearance_worker])
+
+    @Slot(str, object)
+    def _finish_model_load(self, name: str, future):
+        """Add model loaded in background to map"""
+
+        if self._loading_models.get(name, [None])[0] is not future:
+            return  # Model was removed or added again while loading
+        orientation = self._loading_models.pop(name)[1]
+        try:
+            self._add_mesh_item(name, future.result(), orientation)
+        except Exception as e:
+            self.modelLoadFailed.emit(name, repr(e))
+        else:
+            self.modelLoaded.emit(name)
+        self._count_finished_model()
+
+    def _cancel_model_load(self, name: str):
+        """Stop model loading in background from being added to map"""
+
+        if name in self._loading_models:
+            del self._loading_models[name]
+            self._count_finished_model()
+
+    def _count_finished_model(self):
+        """Emit progress of models loading in background"""
+
+        self._models_finished += 1
+        self.modelLoadProgress.emit(self._models_finished, self._models_requested)
+        if not self._loading_models:  # Restart progress count once everything has loaded
+            self._models_requested = self._models_finished = 0
+
+    def _add_mesh_item(self, name: str, mesh, orientation):
+        """Create GLMeshItem of loaded mesh and add it to map
+        :param mesh: key and levels of detail from mesh cache"""
+
+        # Compile orientation first so an invalid orientation leaves an existing model of the same name in place
+        compiled = CompiledOrientation(orientation, self._coordinate_transform)
+        if name in self._cad_models:  # Replace model of same name
+            self.remove_cad_model(name)
+        key, levels = mesh
+        if key not in self._mesh_data:
+            with self.instrumentation.timer('mesh_data'):
+                self._mesh_data[key] = [CachedMeshData(*level) for level in levels]
+        cad_model = gl.GLMeshItem(meshdata=self._mesh_data[key][0],
+                                  smooth=True, drawFaces=True, drawEdges=False, color=MODEL_COLOR,
                                   shader='edgeHilight', glOptions='translucent')
-        # Create orientation matrix
-        map_orientation = self.model_transform_matrix(orientation)
+        self.engine.add_model(name, *levels[0][:2], orientation, key, compiled)
+        map_orientation = self.model_transform_matrix(compiled)
 
         cad_model.setTransform(map_orientation)
         self.plot.addItem(cad_model)
-        self._cad_models[name] = [cad_model,orientation]
+        self._cad_models[name] = [cad_model, orientation, compiled, key]
+        self.update_lod()
+        self.check_clearance({name})
 
-    def model_transform_matrix(self, orientation):
+    def model_transform_matrix(self, orientation, stage_position: dict = None):
         """Function to create current transform matrix containing x,y,z functions.
         :param orientation: orientation QMatrix identifying the transform of model in stage coord sys e.g.
                                                                                         (1, 0, 0, 'x**2',
                                                                                          0, 1, 0, 'sin(y)',
                                                                                          0, 0, 1, 'z',
-                                                                                         0, 0, 0, 1)"""
-        matrix_transform = {v.lstrip('-'): k for k, v in self._coordinate_transformation_map.items() if '0' not in k}
-        m = {matrix_transform[k]: orientation[i:i + 4] for k, i in zip(sorted(matrix_transform.keys()), range(0, 13, 4))}
-        orientation = [*m['x'], *m['y'], *m['z'], *orientation[12:]]
-        map_variable = {**matrix_transform, **{k:k for k in self.stage_position.keys() if k not in matrix_transform.keys()}}
-
-        # symbols are still in stage coordinates so include stage and map variables
-        variables = symbols(list(set(self.stage_position.keys()) | set(matrix_transform.keys())))
-        for i, var in enumerate(orientation):  # Go through coordinates
-            if type(var) == str:
-                fun = parse_expr(var)
-                expression = fun.subs([(var, self.stage_position[map_variable[str(var)]]) for var in variables])
-                orientation[i] = expression.evalf()
-        return qtpy.QtGui.QMatrix4x4(orientation)
+                                                                                         0, 0, 0, 1)
+        or a CompiledOrientation of it. Uncompiled orientations are compiled on every call
+        :param stage_position: stage position in map coordinate system. Defaults to current stage position"""
+
+        if not isinstance(orientation, CompiledOrientation):
+            orientation = CompiledOrientation(orientation, self._coordinate_transform)
+        stage_position = self._stage_position.map if stage_position is None else stage_position
+        return qtpy.QtGui.QMatrix4x4(orientation(stage_position))
 
     def remove_cad_model(self, name: str):
         """Remove cad model from widget"""
 
+        loading = name in self._loading_models
+        self._cancel_model_load(name)
+        if loading and name not in self._cad_models:
+            return
         self.plot.removeItem(self._cad_models[name][0])
-        del self._cad_models[name]
+        key = self._cad_models.pop(name)[3]
+        self.engine.remove_model(name)
+        # Release MeshData if no other model uses it
+        if all(model[3] != key for model in self._cad_models.values()):
+            del self._mesh_data[key]
+        self.check_clearance({name})
+
+    def add_clearance_check(self, name_a: str, name_b: str, threshold: float = 0):
+        """Monitor distance between two cad models on every map update. When models come within threshold of each other
+        clearanceViolated is emitted with their names and distance, both models are highlighted and their closest
+        points joined by a line. Checks may be added before models are loaded, in which case bounding volume
+        hierarchies of models added with add_cad_model_async are built in the loader thread
+        :param threshold: smallest allowed distance between models in map units. 0 only flags intersecting models"""
+
+        self._clearance_checks[(name_a, name_b)] = [threshold, None, None, -1]
+        self.check_clearance({name_a, name_b})
+
+    def remove_clearance_check(self, name_a: str, name_b: str):
+        """Stop monitoring distance between two cad models"""
+
+        del self._clearance_checks[(name_a, name_b)]
+        self._clearance_pending.discard((name_a, name_b))
+        self._highlight_clearance()
+
+    def clearance(self, name_a: str, name_b: str):
+        """Result of last finished clearance check of two cad models. Models violate the check when distance is at most
+        its threshold
+        :return: minimum distance between models, 0 if they intersect, and (2, 3) array of their closest points in map
+        coordinate system. None and None if a model is not loaded or not checked yet"""
+
+        return tuple(self._clearance_checks[(name_a, name_b)][1:3])
+
+    def check_clearance(self, names: set = None, wait: bool = False):
+        """Compute distance between models of clearance checks. Checks run in a background thread so map updates never
+        wait on them. While a check runs, further requests are merged and computed for the latest model transforms
+        once it finishes. Meshes are compared through bounding volume hierarchies built the first time a mesh is
+        checked unless the loader thread already built them
+        :param names: only recompute checks involving these models. None recomputes every check
+        :param wait: compute in the calling thread and return once results are applied"""
+
+        for pair, check in self._clearance_checks.items():
+            if names is not None and not names & set(pair):
+                continue
+            if pair[0] not in self._cad_models or pair[1] not in self._cad_models:
+                check[1:] = [None, None, self._clearance_sequence]
+                self._clearance_pending.discard(pair)
+            else:
+                self._clearance_pending.add(pair)
+        if wait:
+            self._apply_clearance(self._compute_clearance(self._clearance_jobs()))
+        elif not self._clearance_running:
+            self._start_clearance()
+        self._highlight_clearance()
+
+    def _clearance_jobs(self):
+        """Meshes and current transforms of pending clearance checks. Pending checks are cleared
+        :return: sequence number and list of pair, check, models and their mesh key, vertices, faces and transform"""
+
+        self._clearance_sequence += 1
+        stage_position = self._stage_position.map
+        jobs = []
+        for pair in self._clearance_pending:
+            models = [self._cad_models[name] for name in pair]
+            meshes = [(*self.engine.models[name][2:], self.engine.model_pose_map(name, stage_position))
+                      for name in pair]
+            jobs.append((pair, self._clearance_checks[pair], models, meshes))
+        self._clearance_pending.clear()
+        return self._clearance_sequence, jobs
+
+    def _compute_clearance(self, jobs):
+        """Distance between meshes of clearance checks. Safe to call from any thread
+        :param jobs: sequence number and jobs from _clearance_jobs
+        :return: sequence number and list of jobs and their distance and closest points"""
+
+        sequence, jobs = jobs
+        results = []
+        for pair, check, models, (mesh_a, mesh_b) in jobs:
+            with self.instrumentation.timer('clearance_check'):
+                result = clearance(self.engine.mesh_bvh(*mesh_a[:3]), mesh_a[3],
+                                   self.engine.mesh_bvh(*mesh_b[:3]), mesh_b[3])
+            results.append((pair, check, models, result))
+        return sequence, results
+
+    def _start_clearance(self):
+        """Compute pending clearance checks in the background thread"""
+
+        if not self._clearance_pending or self._closed.is_set():
+            return
+        self._clearance_running = True
+        future = self._clearance_worker.submit(self._compute_clearance, self._clearance_jobs())
+        future.add_done_callback(self._emit_clearance_checked)
+
+    def _emit_clearance_checked(self, future):
+        """Callback of background clearance check. Runs in the clearance thread so the signal is queued to the gui
+        thread"""
+
+        with self._background_lock:
+            if not self._closed.is_set():
+                self._clearanceChecked.emit(future)
+
+    @Slot(object)
+    def _finish_clearance(self, future):
+        """Apply results of background clearance check and start checks requested meanwhile"""
+
+        self._clearance_running = False
+        try:
+            self._apply_clearance(future.result())
+        finally:
+            self._start_clearance()
+        self._highlight_clearance()
+
+    def _apply_clearance(self, results):
+        """Store results of clearance checks and emit clearanceViolated. Results of checks or models removed or replaced
+        since the check started and results older than the stored ones are dropped"""
+
+        sequence, results = results
+        for (name_a, name_b), check, models, (distance, points) in results:
+            current = [self._cad_models.get(name) for name in (name_a, name_b)]
+            if self._clearance_checks.get((name_a, name_b)) is not check or check[3] > sequence or \
+                    any(model is not old for model, old in zip(current, models)):
+                continue
+            check[1:] = [distance, points, sequence]
+            if distance <= check[0]:
+                self.clearanceViolated.emit(name_a, name_b, distance)
+
+    def _highlight_clearance(self):
+        """Color models violating clearance and draw line between their closest points"""
+
+        violations = [check for check in self._clearance_checks.items()
+                      if check[1][1] is not None and check[1][1] <= check[1][0]]
+        names = {name for (name_a, name_b), check in violations for name in (name_a, name_b)}
+        for name, model in self._cad_models.items():
+            color = CLEARANCE_VIOLATION_COLOR if name in names else MODEL_COLOR
+            if model[0].opts['color'] != color:
+                model[0].setColor(color)
+        if violations:
+            self.clearance_lines.setData(pos=np.concatenate([check[2] for _, check in violations]))
+        self.clearance_lines.setVisible(bool(violations))
+
+    def update_lod(self):
+        """Draw each cad model at the level of detail fitting its distance from the camera. Every level is a quarter of
+        the faces of the previous and is used from twice the distance"""
+
+        camera = self.plot.cameraPosition()
+        for model in self._cad_models.values():
+            levels = self._mesh_data[model[3]]
+            if len(levels) == 1:
+                continue
+            center = model[0].transform().map(QtGui.QVector3D(*levels[0].center))
+            ratio = (center - camera).length() / max(levels[0].radius * self.lod_distance, 1e-12)
+            level = 0 if ratio <= 1 else min(len(levels) - 1, 1 + int(np.log2(ratio)))
+            if model[0].opts['meshdata'] is not levels[level]:
+                model[0].setMeshData(meshdata=levels[level])
+
+    def eventFilter(self, obj, event):
+        """Update level of detail of cad models after camera moves"""
+
+        if obj is self.plot and event.type() in (QEvent.Type.MouseMove, QEvent.Type.Wheel):
+            self._lod_timer.start()
+        return super().eventFilter(obj, event)
 
     def remove_models_from_plot(self):
         """Convenience function to remove cad models from plot usually for visibility of other objects"""
@@ -284,10 +858,13 @@ class CoPylot(QWidget):
         """Create GLViewWidget and upload position, scan area, and cad models into view"""
 
         plot = gl.GLViewWidget()
+        plot.installEventFilter(self)  # Watch camera movement to update level of detail
+        plot.frameSwapped.connect(self._frame_swapped)
         plot.opts['distance'] = 500  # TODO: Distance should be scaled to scan volume size and size of objectives/mount
-        plot.opts['center'] = QtGui.QVector3D(self.stage_position['x'],
-                                              self.stage_position['y'],
-                                              self.stage_position['z'])
+        stage_position = self._stage_position.map
+        plot.opts['center'] = QtGui.QVector3D(stage_position['x'],
+                                              stage_position['y'],
+                                              stage_position['z'])
         self.scan_vol = gl.GLBoxItem()
         self.scan_vol.setColor(qtpy.QtGui.QColor('gold'))
         plot.addItem(self.scan_vol)
@@ -296,31 +873,76 @@ class CoPylot(QWidget):
         self.pos.setColor(qtpy.QtGui.QColor('red'))
         plot.addItem(self.pos)
 
+        # Tiles added before cad models so they can be seen through models
+        self.tiles = gl.GLLinePlotItem(mode='lines', color=qtpy.QtGui.QColor('cornflowerblue').getRgbF())
+        self.tiles.setVisible(False)
+        self._tiles_geometry_key = None  # Inputs tile geometry was last built from
+        plot.addItem(self.tiles)
+
+        self.clearance_lines = gl.GLLinePlotItem(mode='lines', width=3,
+                                                 color=qtpy.QtGui.QColor('red').getRgbF())
+        self.clearance_lines.setVisible(False)
+        plot.addItem(self.clearance_lines)
+
+        self.trail_item = gl.GLLinePlotItem(mode='lines', color=qtpy.QtGui.QColor('lime').getRgbF())
+        self.trail_item.setVisible(False)
+        plot.addItem(self.trail_item)
+
+        self.points_item = gl.GLScatterPlotItem(pos=np.zeros((0, 3)), pxMode=False)
+        self._point_map_buffer = np.zeros((0, 3))  # Map positions of points and space for points added later
+        self._point_map_positions = self._point_map_buffer
+        self._points_size = None
+        self._point_label_items = []  # Text items reused to draw the nearest labels
+        plot.addItem(self.points_item)
+
         return plot
 
     @Slot(int)
     def update_map(self, *args):
         """Update map with new values of key values"""
 
-        shifted_pos = {k: v - (.5 * self.fov.get(k, 0)) for k, v in self.stage_position.items()}
-
-        self.pos.setSize(*[self.fov.get(k, 0)for k in ['x', 'y', 'z']])
-        self.pos.setTransform(qtpy.QtGui.QMatrix4x4(1, 0, 0, shifted_pos['x'],
-                                                    0, 1, 0, shifted_pos['y'],
-                                                    0, 0, 1, shifted_pos['z'],
-                                                    0, 0, 0, 1))
-
-        self.scan_vol.setSize(*[self.scanning_volume.get(k, 0)for k in ['x', 'y', 'z']])
-        self.scan_vol.setTransform(qtpy.QtGui.QMatrix4x4(1, 0, 0, shifted_pos['x'],
-                                                         0, 1, 0, shifted_pos['y'],
-                                                         0, 0, 1, shifted_pos['z'],
-                                                         0, 0, 0, 1))
-
-        for k, model in self._cad_models.items():
-            map_orientation = self.model_transform_matrix(model[1])
-            model[0].setTransform(map_orientation)
-        if self.tiling_widget.isChecked():
-            self.draw_tiles()
+        timer = self.instrumentation.timer
+        with timer('update_map'):
+            with timer('update_map.boxes'):
+                stage_position, fov = self._stage_position.map, self._fov.map
+                shifted_pos = {k: v - (.5 * fov.get(k, 0)) for k, v in stage_position.items()}
+
+                self.pos.setSize(*[fov.get(k, 0)for k in ['x', 'y', 'z']])
+                self.pos.setTransform(qtpy.QtGui.QMatrix4x4(1, 0, 0, shifted_pos['x'],
+                                                            0, 1, 0, shifted_pos['y'],
+                                                            0, 0, 1, shifted_pos['z'],
+                                                            0, 0, 0, 1))
+
+                self.scan_vol.setSize(*[self._scanning_volume.map.get(k, 0)for k in ['x', 'y', 'z']])
+                self.scan_vol.setTransform(qtpy.QtGui.QMatrix4x4(1, 0, 0, shifted_pos['x'],
+                                                                 0, 1, 0, shifted_pos['y'],
+                                                                 0, 0, 1, shifted_pos['z'],
+                                                                 0, 0, 0, 1))
+
+            with timer('update_map.models'):
+                # Only transform models depending on stage axes that moved
+                changed_axes = {k for k in self.stage_position.keys() | self._drawn_stage_position.keys()
+                                if self.stage_position.get(k) != self._drawn_stage_position.get(k)}
+                self._drawn_stage_position = dict(self.stage_position)
+                moved = set()
+                for k, model in self._cad_models.items():
+                    if model[2].axes & changed_axes:
+                        map_orientation = self.model_transform_matrix(model[2], stage_position)
+                        model[0].setTransform(map_orientation)
+                        moved.add(k)
+            if moved and self._clearance_checks:
+                with timer('update_map.clearance'):
+                    self.check_clearance(moved)
+            if self.tiling_widget.isChecked():
+                with timer('update_map.tiles'):
+                    self.draw_tiles()
+            with timer('update_map.lod'):
+                self.update_lod()
+            if self._trail_changed:
+                with timer('update_map.trail'):
+                    self._draw_trail()
+            if len(self.points) and self._points_size != min([abs(.15*v) for v in fov.values()]):
+                self._draw_points()  # Point size follows fov
 
     def create_laid_out_widget(self, struct: str, **kwargs):
         """Creates either a horizontal or vertical layout populated with widgets
@@ -353,3 +975,4 @@ class CoPylot(QWidget):
 
     coordinate_transformation_map = property(fget=_get_coordinate_transformation_map,
                                              fset=_set_coordinate_transformation_map)
+    max_refresh_rate = property(fget=_get_max_refresh_rate, fset=_set_max_refresh_rate)
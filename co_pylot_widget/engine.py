@@ -0,0 +1,185 @@
+import numpy as np
+import threading
+from co_pylot_widget.coordinates import CoordinateTransform
+from co_pylot_widget.orientation import CompiledOrientation
+from co_pylot_widget.clearance import BVH, clearance
+from co_pylot_widget.meshcache import MeshCache
+from co_pylot_widget.tiling import CHUNK_SIZE, grid_chunks, merge_factors, tile_grid, tile_plan
+
+
+class GeometryEngine:
+
+    def __init__(self, coordinate_transformation_map: dict, mesh_cache_dir: str = None):
+        """Geometry of co-pylot without Qt: coordinate remapping, tile grids, model poses and clearances. Stage values
+        are passed to every call in the stage coordinate system so one engine can evaluate many candidate positions.
+        Engines can be pickled to worker processes
+        :param coordinate_transformation_map: how stage coordinates translate to the map coordinate system e.g.
+        {x:-y, y:z, z:x}
+        :param mesh_cache_dir: directory where parsed stl files are cached. See MeshCache"""
+
+        self.mesh_cache = MeshCache(mesh_cache_dir)
+        self.models = {}  # Model name and its orientation, compiled orientation, mesh key, vertexes and faces
+        self._bvh = {}  # Bounding volume hierarchies of meshes built when first needed
+        self._bvh_lock = threading.Lock()
+        self._set_coordinate_transformation_map(coordinate_transformation_map)
+
+    def __getstate__(self):
+        # Hierarchies are rebuilt on demand rather than copied to other processes
+        return {key: value for key, value in self.__dict__.items() if key not in ('_bvh', '_bvh_lock')}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state, _bvh={}, _bvh_lock=threading.Lock())
+
+    def _get_coordinate_transformation_map(self):
+        return self.coordinate_transform.coordinate_transformation_map
+
+    def _set_coordinate_transformation_map(self, value: dict):
+        self.coordinate_transform = CoordinateTransform(value)
+        for model in self.models.values():  # Recompile orientations for new transform
+            model[1] = CompiledOrientation(model[0], self.coordinate_transform)
+
+    def stage_to_map(self, stage_values: dict):
+        """Remap a dictionary of values from stage coordinate system to map coordinate system"""
+
+        return self.coordinate_transform.stage_to_map_dict(stage_values)
+
+    def map_to_stage(self, map_values: dict):
+        """Remap a dictionary of values from map coordinate system to stage coordinate system"""
+
+        return self.coordinate_transform.map_to_stage_dict(map_values)
+
+    def tile_boxes(self, scanning_volume: dict, fov: dict, tile_overlap_pct: dict, max_tiles: int = None):
+        """Boxes of the tiles of a scan in map coordinate system relative to the stage position. The tile grid is
+        calculated in stage coordinate system and tile corners transformed to map in one call
+        :param scanning_volume: volume of scan in stage coordinate system e.g. {x:110, y:60, z:200}
+        :param fov: size of camera fov in stage coordinate system e.g. {x:2304, y:1152}
+        :param tile_overlap_pct: overlap between tiles in stage coordinate system e.g. {x:15, y:15}
+        :param max_tiles: most boxes returned. See tile_box_chunks
+        :return: lower and upper (N, 3) arrays of tile corners ordered as map x, y, z"""
+
+        count, chunks = self.tile_box_chunks(scanning_volume, fov, tile_overlap_pct, max_tiles)
+        chunks = list(chunks)
+        if not chunks:
+            return np.zeros((0, 3)), np.zeros((0, 3))
+        return tuple(np.concatenate(corners) for corners in zip(*chunks))
+
+    def tile_box_chunks(self, scanning_volume: dict, fov: dict, tile_overlap_pct: dict, max_tiles: int = None,
+                        chunk_size: int = CHUNK_SIZE):
+        """Boxes of the tiles of a scan in map coordinate system relative to the stage position generated in chunks.
+        Past max_tiles, blocks of neighbouring tiles are merged into one box so at most max_tiles boxes are generated
+        :param max_tiles: most boxes generated. None for a box per tile
+        :param chunk_size: most boxes per chunk
+        :return: number of boxes and generator of lower and upper (n, 3) arrays of box corners"""
+
+        axes = self.coordinate_transform.stage_axes
+        grid_step, steps, tile_volume = tile_grid(scanning_volume, fov, tile_overlap_pct, axes)
+        grid_step = np.array([grid_step[k] for k in axes], dtype=float)
+        steps = np.array([max(steps[k], 0) for k in axes], dtype=np.int64)
+        size = np.array([tile_volume[k] for k in axes], dtype=float)
+        start = -.5 * np.array([fov.get(k, 0) for k in axes], dtype=float)
+        end = start + (steps - 1) * grid_step + size  # Upper corner of last tile
+        factors = np.ones(len(axes), dtype=np.int64) if max_tiles is None else merge_factors(steps, max_tiles)
+        block_steps = -(-steps // factors)
+        block_size = (factors - 1) * grid_step + size
+
+        def boxes():
+            for lower in grid_chunks(grid_step * factors, block_steps, start, chunk_size=chunk_size):
+                yield self.coordinate_transform.stage_to_map_bounds(lower, np.minimum(lower + block_size, end))
+
+        return int(np.prod(block_steps)), boxes()
+
+    def tile_plan(self, stage_position: dict, scanning_volume: dict, fov: dict, tile_overlap_pct: dict,
+                  order: str = 'raster', chunk_size: int = CHUNK_SIZE):
+        """Lazily generate the stage position every tile of a scan starting at stage_position is imaged at, so plans
+        of millions of tiles are handed out in chunks of arrays. See tiling.tile_plan
+        :param order: 'raster' or 'serpentine'
+        :param chunk_size: most tiles per chunk
+        :return: generator of (n, 3) arrays of positions in stage coordinate system ordered as
+        coordinate_transform.stage_axes"""
+
+        return tile_plan(scanning_volume, fov, tile_overlap_pct, self.coordinate_transform.stage_axes,
+                         self.coordinate_transform.stage_vector(stage_position), order, chunk_size)
+
+    def tile_positions(self, stage_position: dict, scanning_volume: dict, fov: dict, tile_overlap_pct: dict,
+                       order: str = 'raster'):
+        """Stage position every tile of a scan starting at stage_position is imaged at
+        :return: (N, 3) array of positions in stage coordinate system ordered as coordinate_transform.stage_axes"""
+
+        chunks = list(self.tile_plan(stage_position, scanning_volume, fov, tile_overlap_pct, order))
+        return np.concatenate(chunks) if chunks else np.zeros((0, 3))
+
+    def add_model(self, name: str, vertexes, faces, orientation, key: str = None,
+                  compiled: CompiledOrientation = None):
+        """Add mesh of a cad model and how it moves with the stage
+        :param vertexes: (V, 3) array of vertices in model space
+        :param faces: (N, 3) array of faces indexing vertexes
+        :param orientation: orientation of model in stage coordinate system. See CoPylot.add_cad_model
+        :param key: key of mesh so models of the same mesh share a bounding volume hierarchy. Defaults to name
+        :param compiled: orientation already compiled for coordinate_transform. Compiled when None"""
+
+        key = name if key is None else key
+        if compiled is None:
+            compiled = CompiledOrientation(orientation, self.coordinate_transform)
+        self.models[name] = [orientation, compiled, key, vertexes, faces]
+
+    def load_model(self, name: str, path: str, orientation):
+        """Add cad model from stl file through the mesh cache"""
+
+        key, vertexes, faces, _ = self.mesh_cache.load(path)
+        self.add_model(name, vertexes, faces, orientation, key)
+
+    def remove_model(self, name: str):
+        """Remove cad model and release its bounding volume hierarchy if no other model uses it"""
+
+        key = self.models.pop(name)[2]
+        if all(model[2] != key for model in self.models.values()):
+            with self._bvh_lock:
+                self._bvh.pop(key, None)
+
+    def bvh(self, name: str):
+        """Bounding volume hierarchy of mesh of model"""
+
+        return self.mesh_bvh(*self.models[name][2:])
+
+    def mesh_bvh(self, key: str, vertexes, faces):
+        """Bounding volume hierarchy of a mesh built the first time its key is requested. Safe to call from any thread
+        so hierarchies can be built next to loading the mesh
+        :param key: key of mesh shared by models of the same mesh"""
+
+        with self._bvh_lock:
+            bvh = self._bvh.get(key)
+        if bvh is None:  # Built outside the lock so other meshes are not held up
+            bvh = BVH(vertexes, faces)
+            with self._bvh_lock:
+                bvh = self._bvh.setdefault(key, bvh)
+        return bvh
+
+    def model_pose(self, name: str, stage_position: dict):
+        """Transform matrix of model at a stage position
+        :param stage_position: stage position in stage coordinate system
+        :return: 4x4 array"""
+
+        return self.model_pose_map(name, self.stage_to_map(stage_position))
+
+    def model_pose_map(self, name: str, map_position: dict):
+        """Transform matrix of model at a stage position given in map coordinate system
+        :return: 4x4 array"""
+
+        return np.array(self.models[name][1](map_position)).reshape(4, 4)
+
+    def clearance(self, name_a: str, name_b: str, stage_position: dict, cutoff: float = np.inf):
+        """Minimum distance between two models at a stage position. See clearance.clearance
+        :param stage_position: stage position in stage coordinate system
+        :param cutoff: stop once models are known to be further apart than cutoff
+        :return: distance and (2, 3) array of closest points in map coordinate system or cutoff and None"""
+
+        return self.clearance_map(name_a, name_b, self.stage_to_map(stage_position), cutoff)
+
+    def clearance_map(self, name_a: str, name_b: str, map_position: dict, cutoff: float = np.inf):
+        """Minimum distance between two models at a stage position given in map coordinate system"""
+
+        return clearance(self.bvh(name_a), self.model_pose_map(name_a, map_position),
+                         self.bvh(name_b), self.model_pose_map(name_b, map_position), cutoff=cutoff)
+
+    coordinate_transformation_map = property(fget=_get_coordinate_transformation_map,
+                                             fset=_set_coordinate_transformation_map)
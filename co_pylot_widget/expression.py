@@ -0,0 +1,78 @@
+import ast
+import math
+import numpy as np
+
+# Functions and constants expressions may use. Names follow sympy so orientations written for parse_expr still work
+FUNCTIONS = ['sin', 'cos', 'tan', 'asin', 'acos', 'atan', 'atan2', 'sinh', 'cosh', 'tanh', 'sqrt', 'exp', 'log',
+             'abs', 'Abs']
+CONSTANTS = {'pi': math.pi, 'E': math.e}
+OPERATORS = {ast.Add: '+', ast.Sub: '-', ast.Mult: '*', ast.Div: '/', ast.Pow: '**', ast.Mod: '%',
+             ast.USub: '-', ast.UAdd: '+'}
+MODULES = {'math': {**{name: getattr(math, name) for name in FUNCTIONS if hasattr(math, name)},
+                    'abs': abs, 'Abs': abs},
+           'numpy': {**{name: getattr(np, name) for name in ['sin', 'cos', 'tan', 'sinh', 'cosh', 'tanh', 'sqrt',
+                                                            'exp', 'log']},
+                     'asin': np.arcsin, 'acos': np.arccos, 'atan': np.arctan, 'atan2': np.arctan2,
+                     'abs': np.abs, 'Abs': np.abs}}
+
+
+class UnsupportedExpression(ValueError):
+    """Expression uses syntax the built-in compiler does not handle"""
+
+
+class ExpressionSyntaxError(SyntaxError):
+    """Expression is not valid syntax. Not retried with sympy"""
+
+
+def compile_expression(expression: str, module: str = 'numpy'):
+    """Compile an arithmetic expression of variables into a python function. Supports +, -, *, /, **, %, numbers,
+    pi, E and the functions in FUNCTIONS. Every other name is a variable
+    :param expression: expression e.g. 'x**2 + sin(y)'
+    :param module: 'numpy' for functions working on arrays or 'math' for faster functions of single numbers
+    :return: function taking variables as positional arguments and the sorted variable names
+    :raises ExpressionSyntaxError: if expression can't be parsed
+    :raises UnsupportedExpression: if expression parses but uses syntax not listed above"""
+
+    try:
+        tree = ast.parse(expression.strip(), mode='eval')
+    except SyntaxError as e:
+        raise ExpressionSyntaxError(f'Could not parse expression {expression!r}: {e.msg}') from None
+    variables = set()
+    source = _source(tree.body, variables)
+    args = sorted(variables)
+    namespace = {'__builtins__': {}, **MODULES[module], **CONSTANTS}
+    return eval(f'lambda {", ".join(args)}: {source}', namespace), args
+
+
+def _source(node, variables: set):
+    """Python source of a node of an expression tree checking only supported syntax is used"""
+
+    if isinstance(node, ast.BinOp) and type(node.op) in OPERATORS:
+        return f'({_source(node.left, variables)} {OPERATORS[type(node.op)]} {_source(node.right, variables)})'
+    if isinstance(node, ast.UnaryOp) and type(node.op) in OPERATORS:
+        return f'({OPERATORS[type(node.op)]}{_source(node.operand, variables)})'
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return repr(node.value)
+    if isinstance(node, ast.Name) and node.id not in FUNCTIONS:
+        if node.id not in CONSTANTS:
+            variables.add(node.id)
+        return node.id
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS \
+            and not node.keywords:
+        return f'{node.func.id}({", ".join(_source(arg, variables) for arg in node.args)})'
+    raise UnsupportedExpression(f'Unsupported syntax {ast.dump(node)}')
+
+
+def compile_sympy_expression(expression: str, module: str = 'numpy'):
+    """Compile expression with sympy for syntax the built-in compiler does not handle. Sympy is imported only when an
+    expression needs it
+    :return: function taking variables as positional arguments and the sorted variable names"""
+
+    try:
+        from sympy import lambdify
+        from sympy.parsing.sympy_parser import parse_expr
+    except ImportError:
+        raise UnsupportedExpression(f'{expression!r} needs sympy which is not installed') from None
+    fun = parse_expr(expression)
+    args = sorted(fun.free_symbols, key=str)
+    return lambdify(args, fun, module), [str(arg) for arg in args]
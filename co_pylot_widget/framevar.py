@@ -0,0 +1,88 @@
+class FrameVar:
+
+    def __set_name__(self, owner, name):
+        self.name = f"_{name}"
+
+    def __get__(self, instance, owner=None):
+        """Values in stage coordinate system. Values in map coordinate system are at instance._<name>.map"""
+        if instance is None:
+            return self
+        return instance.__dict__[self.name].stage
+
+    def __set__(self, instance, value: dict):
+        """Update values given in stage coordinate system. Axes not in value are kept"""
+        if self.name not in instance.__dict__:
+            instance.__dict__[self.name] = FrameStore(instance.stage_to_map_coord_transform,
+                                                      lambda: instance.valueChanged.emit(0))
+        instance.__dict__[self.name].update(value)
+
+
+class FrameStore:
+
+    def __init__(self, to_map, changed):
+        """Values kept in both stage and map coordinate system. Stage values are the source of truth and map values
+        are updated once on every write so reading either is a plain attribute lookup.
+        :param to_map: function transforming a dictionary from stage to map coordinate system
+        :param changed: function called after values change"""
+
+        self.stage = StageDict(self)
+        self.map = {}
+        self._to_map = to_map
+        self._changed = changed
+
+    def update(self, stage_values: dict, emit: bool = True):
+        """Update values from dictionary in stage coordinate system
+        :param stage_values: new values in stage coordinate system
+        :param emit: call changed function after update"""
+
+        dict.update(self.stage, stage_values)
+        self.refresh()
+        if emit:
+            self._changed()
+
+    def refresh(self):
+        """Recalculate map values from stage values e.g. when coordinate transformation map changes"""
+
+        self.map = self._to_map(dict(self.stage))
+
+
+class StageDict(dict):
+
+    def __init__(self, store: FrameStore):
+        """Dictionary of values in stage coordinate system that keeps its store in sync. Every method changing items
+        goes through the store so map values are refreshed and the change is emitted"""
+        super().__init__()
+        self._store = store
+
+    def __setitem__(self, key, value):
+        self._store.update({key: value})
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._store.update({})
+
+    def update(self, *args, **kwargs):
+        self._store.update(dict(*args, **kwargs))
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self._store.update({key: default})
+        return self[key]
+
+    def pop(self, key, *default):
+        value = super().pop(key, *default)
+        self._store.update({})
+        return value
+
+    def popitem(self):
+        item = super().popitem()
+        self._store.update({})
+        return item
+
+    def clear(self):
+        super().clear()
+        self._store.update({})
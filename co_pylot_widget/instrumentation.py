@@ -0,0 +1,122 @@
+import numpy as np
+import threading
+from collections import deque
+from contextlib import nullcontext
+from time import perf_counter
+
+NULL_TIMER = nullcontext()
+LATENCY_BINS_MS = [0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, np.inf]
+
+
+class Instrumentation:
+
+    def __init__(self, enabled: bool = False, history: int = 1000):
+        """Rolling timings of hot paths. When disabled, timers are a shared no-op context manager so instrumented code
+        only pays for one method call
+        :param enabled: record timings
+        :param history: number of most recent samples kept per timer"""
+
+        self.enabled = enabled
+        self.history = history
+        self.samples = {}
+        self.latencies = deque(maxlen=history)
+        self.frames = deque(maxlen=history)
+        self._lock = threading.Lock()  # Held while samples change or are copied since loader threads record timings
+
+    def timer(self, name: str):
+        """Context manager recording the duration of its block under name. Safe to use from any thread"""
+
+        if not self.enabled:
+            return NULL_TIMER
+        return _Timing(self, name)
+
+    def record(self, name: str, seconds: float):
+        """Record a duration under name"""
+
+        with self._lock:
+            if name not in self.samples:
+                self.samples[name] = deque(maxlen=self.history)
+            self.samples[name].append(seconds)
+
+    def record_latency(self, seconds: float):
+        """Record time from a stage update arriving to it being drawn"""
+
+        with self._lock:
+            self.latencies.append(seconds)
+
+    def record_frame(self):
+        """Record time a frame was painted"""
+
+        with self._lock:
+            self.frames.append(perf_counter())
+
+    def fps(self):
+        """Paint rate over the recorded frames of the last second"""
+
+        with self._lock:
+            frames = list(self.frames)
+        now = perf_counter()
+        recent = [t for t in frames if now - t <= 1]
+        if len(recent) < 2:
+            return 0.0
+        return (len(recent) - 1) / (recent[-1] - recent[0]) if recent[-1] > recent[0] else 0.0
+
+    def clear(self):
+        """Drop all samples"""
+
+        with self._lock:
+            self.samples.clear()
+            self.latencies.clear()
+            self.frames.clear()
+
+    def stats(self):
+        """Summary of timers in ms, stage update to render latency histogram and paint fps"""
+
+        with self._lock:  # Copy samples so recording threads can carry on while they are summarized
+            samples = {name: list(samples) for name, samples in self.samples.items() if samples}
+            latencies = list(self.latencies)
+        timers = {name: summary(samples) for name, samples in samples.items()}
+        latency = summary(latencies)
+        counts, _ = np.histogram(np.array(latencies) * 1e3, bins=LATENCY_BINS_MS)
+        latency['histogram'] = {'bins_ms': LATENCY_BINS_MS, 'counts': counts.tolist()}
+        return {'timers': timers, 'latency': latency, 'fps': self.fps()}
+
+
+class _Timing:
+    __slots__ = ('instrumentation', 'name', 'start')
+
+    def __init__(self, instrumentation: Instrumentation, name: str):
+        self.instrumentation = instrumentation
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+
+    def __exit__(self, *exc):
+        self.instrumentation.record(self.name, perf_counter() - self.start)
+
+
+def summary(samples):
+    """Count, mean, median, 95th percentile and max of durations in ms"""
+
+    if not samples:
+        return {'count': 0}
+    ms = np.array(samples) * 1e3
+    return {'count': len(ms),
+            'mean_ms': float(ms.mean()),
+            'p50_ms': float(np.percentile(ms, 50)),
+            'p95_ms': float(np.percentile(ms, 95)),
+            'max_ms': float(ms.max())}
+
+
+def format_stats(stats: dict):
+    """Multi line text of stats for on screen overlay"""
+
+    lines = [f'fps {stats["fps"]:.1f}']
+    latency = stats['latency']
+    if latency['count']:
+        lines.append(f'latency p50 {latency["p50_ms"]:.1f} ms  p95 {latency["p95_ms"]:.1f} ms  '
+                     f'max {latency["max_ms"]:.1f} ms')
+    for name, timer in stats['timers'].items():
+        lines.append(f'{name} {timer["mean_ms"]:.2f} ms  p95 {timer["p95_ms"]:.2f} ms  n {timer["count"]}')
+    return '\n'.join(lines)
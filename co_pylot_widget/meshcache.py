@@ -0,0 +1,177 @@
+import numpy as np
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = Path(os.environ.get('CO_PYLOT_CACHE_DIR', Path.home() / '.cache' / 'co-pylot-widget'))
+MESH_ARRAYS = ['vertexes', 'faces', 'normals']
+
+
+def weld_vertices(points):
+    """Merge duplicate vertices of an unindexed triangle list into an indexed mesh
+    :param points: (N*3, 3) array of triangle corners where every 3 rows is a triangle
+    :return: (V, 3) float32 array of unique vertices and (N, 3) uint32 array of faces indexing vertices"""
+
+    points = np.ascontiguousarray(points, dtype=np.float32) + np.float32(0)  # Adding 0 turns -0.0 into 0.0
+    # Compare vertices as raw bytes so unique works on a 1D array
+    _, index, inverse = np.unique(points.view(np.dtype((np.void, points.dtype.itemsize * 3))).ravel(),
+                                  return_index=True, return_inverse=True)
+    return points[index], inverse.reshape(-1, 3).astype(np.uint32)
+
+
+def vertex_normals(vertexes, faces):
+    """Normal of every vertex as the normalized sum of the normals of faces using it
+    :return: (V, 3) float32 array"""
+
+    triangles = vertexes[faces]
+    face_normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    face_normals /= np.maximum(np.linalg.norm(face_normals, axis=1, keepdims=True), 1e-12)
+    normals = np.zeros(vertexes.shape, dtype=np.float64)
+    for i in range(3):
+        normals[:, i] = sum(np.bincount(faces[:, corner], weights=face_normals[:, i], minlength=len(vertexes))
+                            for corner in range(3))
+    normals /= np.maximum(np.linalg.norm(normals, axis=1, keepdims=True), 1e-12)
+    return normals.astype(np.float32)
+
+
+def cluster_vertices(vertexes, faces, cell_size: float):
+    """Simplify mesh by merging all vertices within the same cell of a grid into their mean and dropping faces that
+    collapse
+    :param cell_size: edge length of grid cells
+    :return: vertexes and faces of simplified mesh"""
+
+    cells = np.floor((vertexes - vertexes.min(axis=0)) / cell_size).astype(np.int64)
+    shape = cells.max(axis=0) + 1
+    _, cluster = np.unique((cells[:, 0] * shape[1] + cells[:, 1]) * shape[2] + cells[:, 2], return_inverse=True)
+    cluster = cluster.ravel()
+    counts = np.bincount(cluster)
+    clustered = np.stack([np.bincount(cluster, weights=vertexes[:, i]) for i in range(3)], axis=1) / counts[:, None]
+    faces = cluster[faces]
+    faces = faces[(faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 0] != faces[:, 2])]
+    _, unique_faces = np.unique(np.sort(faces, axis=1), axis=0, return_index=True)  # Drop duplicate faces
+    return clustered.astype(np.float32), faces[np.sort(unique_faces)].astype(np.uint32)
+
+
+def decimate(vertexes, faces, triangle_budget: int):
+    """Simplify mesh to at most triangle_budget faces by vertex clustering. The grid is coarsened until the budget is
+    met
+    :return: vertexes, faces and vertex normals of simplified mesh"""
+
+    extent = float((vertexes.max(axis=0) - vertexes.min(axis=0)).max()) or 1.0
+    cell_size = extent / np.sqrt(triangle_budget)
+    decimated = cluster_vertices(vertexes, faces, cell_size)
+    while len(decimated[1]) > triangle_budget:
+        cell_size *= max(np.sqrt(len(decimated[1]) / triangle_budget), 1.05)
+        decimated = cluster_vertices(vertexes, faces, cell_size)
+    return [*decimated, vertex_normals(*decimated)]
+
+
+class MeshCache:
+
+    def __init__(self, cache_dir=None):
+        """Cache of indexed meshes parsed from stl files. Meshes are kept in memory so files used by several models
+        are only loaded once and persisted as .npy files in cache_dir so they are memory mapped instead of parsed
+        the next time. Cached meshes are keyed on file path, modification time and size.
+        :param cache_dir: directory of cached meshes. Defaults to CO_PYLOT_CACHE_DIR environment variable or
+        ~/.cache/co-pylot-widget"""
+
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else DEFAULT_CACHE_DIR
+        self._meshes = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}  # Lock per mesh so a file loaded from several threads is only parsed once
+
+    def __getstate__(self):
+        # Only the cache directory is sent to other processes. Meshes in memory are loaded again from disk there
+        return {'cache_dir': self.cache_dir}
+
+    def __setstate__(self, state):
+        self.__init__(state['cache_dir'])
+
+    def key(self, path):
+        """Key of current version of stl file"""
+
+        path = Path(path).resolve()
+        stat = path.stat()
+        return hashlib.sha1(f'{path}|{stat.st_mtime_ns}|{stat.st_size}'.encode()).hexdigest()
+
+    def load(self, path):
+        """Load indexed mesh of stl file from memory, disk cache or by parsing the file. Safe to call from any thread
+        :param path: the path of the stl file
+        :return: key, vertexes, faces and vertex normals of mesh"""
+
+        key = self.key(path)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            if key not in self._meshes:
+                files = [self.cache_dir / f'{key}.{name}.npy' for name in MESH_ARRAYS]
+                try:
+                    self._meshes[key] = [np.load(file, mmap_mode='r') for file in files]
+                except (OSError, ValueError):
+                    self._meshes[key] = self.parse(path)
+                    self.save(files, self._meshes[key])
+        return (key, *self._meshes[key])
+
+    def load_levels(self, path, triangle_budget: int = None, min_triangles: int = 1000, max_levels: int = 4):
+        """Load mesh of stl file and a pyramid of decimated meshes. The first decimated level has at most
+        triangle_budget faces and every following level a quarter of the previous. Decimated levels are cached in
+        memory and on disk alongside the mesh. Safe to call from any thread
+        :param path: the path of the stl file
+        :param triangle_budget: faces of first decimated level. None or a budget larger than the mesh gives no pyramid
+        :param min_triangles: smallest number of faces of a decimated level
+        :param max_levels: maximum number of levels including the full resolution mesh
+        :return: key of pyramid and list of vertexes, faces and vertex normals of each level starting at full
+        resolution"""
+
+        key, *mesh = self.load(path)
+        if triangle_budget is None or len(mesh[1]) <= triangle_budget:
+            return key, [mesh]
+        lod_key = f'{key}.lod{triangle_budget}'
+        with self._key_locks[key]:
+            if lod_key not in self._meshes:
+                files = [[self.cache_dir / f'{lod_key}.{level}.{name}.npy' for name in MESH_ARRAYS]
+                         for level in range(1, max_levels)]
+                levels = []
+                try:
+                    for level_files in files:
+                        if not level_files[0].exists():
+                            break
+                        levels.append([np.load(file, mmap_mode='r') for file in level_files])
+                except (OSError, ValueError):
+                    levels = []
+                if not levels:
+                    budget = triangle_budget
+                    while len(levels) < max_levels - 1 and budget >= min_triangles:
+                        levels.append(decimate(*(levels[-1] if levels else mesh)[:2], budget))
+                        self.save(files[len(levels) - 1], levels[-1])
+                        budget //= 4
+                self._meshes[lod_key] = levels
+        return lod_key, [mesh, *self._meshes[lod_key]]
+
+    def parse(self, path):
+        """Parse stl file into welded vertexes, faces and vertex normals"""
+
+        import stl  # Imported when a file is first parsed since cached meshes don't need it
+        stl_mesh = stl.mesh.Mesh.from_file(path)
+        vertexes, faces = weld_vertices(stl_mesh.points.reshape(-1, 3))
+        return [vertexes, faces, vertex_normals(vertexes, faces)]
+
+    def save(self, files, arrays):
+        """Write arrays to cache. Files are written under temporary names and renamed so readers never see a partially
+        written mesh. Cache is skipped if it can't be written"""
+
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            for file, array in zip(files, arrays):
+                temporary = file.with_name(f'{file.name}.{os.getpid()}.tmp')
+                with open(temporary, 'wb') as f:
+                    np.save(f, array)
+                os.replace(temporary, file)
+        except OSError:
+            pass
+
+    def clear(self):
+        """Drop meshes held in memory. Files in cache_dir are kept"""
+
+        self._meshes.clear()
@@ -0,0 +1,28 @@
+import pyqtgraph.opengl as gl
+import numpy as np
+
+
+class CachedMeshData(gl.MeshData):
+
+    def __init__(self, vertexes, faces, vertex_normals):
+        """MeshData of an indexed mesh with precomputed vertex normals. MeshData computes vertex normals in a python loop
+        over every vertex so normals from the mesh cache are used instead. One instance is shared by all models using
+        the same stl file
+        :param vertexes: (V, 3) array of vertices
+        :param faces: (N, 3) array of faces indexing vertexes
+        :param vertex_normals: (V, 3) array of normals of vertexes"""
+
+        super().__init__(vertexes=vertexes, faces=faces)
+        self._vertex_normals = np.ascontiguousarray(vertex_normals, dtype=np.float32)
+        # Bounding sphere used to pick level of detail
+        lower, upper = self._vertexes.min(axis=0), self._vertexes.max(axis=0)
+        self.center = (lower + upper) / 2
+        self.radius = float(np.linalg.norm(upper - lower)) / 2
+
+    def vertexNormals(self, indexed=None):
+        if indexed is None:
+            return self._vertex_normals
+        elif indexed == 'faces':
+            return self._vertex_normals[self.faces()]
+        else:
+            raise Exception("Invalid indexing mode. Accepts: None, 'faces'")
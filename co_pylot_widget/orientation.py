@@ -0,0 +1,49 @@
+from co_pylot_widget.coordinates import CoordinateTransform
+from co_pylot_widget.expression import compile_expression, compile_sympy_expression, UnsupportedExpression
+import numpy as np
+
+
+class CompiledOrientation:
+
+    def __init__(self, orientation, coordinate_transform: CoordinateTransform):
+        """Orientation matrix of a cad model compiled into fast numeric functions of the stage axes. Compiling is done
+        once per model and coordinate transformation map so evaluating on stage update needs no expression parsing.
+        :param orientation: orientation QMatrix identifying the transform of model in stage coord sys e.g.
+                                                                                        (1, 0, 0, 'x**2',
+                                                                                         0, 1, 0, 'sin(y)',
+                                                                                         0, 0, 1, 'z',
+                                                                                         0, 0, 0, 1)
+        :param coordinate_transform: transform between stage and GLViewWidget coordinate systems"""
+
+        self.orientation = orientation
+        self.coordinate_transform = coordinate_transform
+        # Row of each stage axis is moved to the row of the map axis it transforms to
+        rows = [orientation[i:i + 4] for i in range(0, 12, 4)]
+        self.template = [*[v for i in range(3) for v in rows[int(np.argmax(coordinate_transform.permutation[i]))]],
+                         *orientation[12:]]
+        # symbols are still in stage coordinates so look up value of stage axis in map coordinate system
+        self.expressions = []
+        self.axes = set()  # Stage axes orientation depends on
+        for i, var in enumerate(self.template):  # Go through coordinates
+            if type(var) == str:
+                try:
+                    fun, args = compile_expression(var, 'math')
+                except UnsupportedExpression:  # Valid syntax the built-in compiler doesn't handle
+                    fun, args = compile_sympy_expression(var, 'math')
+                self.axes.update(args)
+                self.expressions.append((i, fun, [coordinate_transform.stage_axis_in_map(arg)[0] for arg in args]))
+                self.template[i] = 0.0
+
+    def __reduce__(self):
+        # Compiled functions can't be pickled so orientation is compiled again when unpickled
+        return CompiledOrientation, (self.orientation, self.coordinate_transform)
+
+    def __call__(self, map_position: dict):
+        """Evaluate orientation at a stage position given in map coordinate system
+        :param map_position: stage position in map coordinate system
+        :return: list of the 16 values of the transform matrix"""
+
+        values = list(self.template)
+        for i, fun, axes in self.expressions:
+            values[i] = float(fun(*[map_position[axis] for axis in axes]))
+        return values
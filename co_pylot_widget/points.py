@@ -0,0 +1,160 @@
+import numpy as np
+
+
+class KDTree:
+
+    def __init__(self, points, leaf_size: int = 32):
+        """Static kd tree of points. Nodes split the points of their parent at the median of the widest axis and are
+        stored in flat lists so the tree is cheap to rebuild when points change
+        :param points: (N, D) array of points
+        :param leaf_size: most points of a leaf"""
+
+        self.points = np.asarray(points, dtype=float)
+        self.index = np.arange(len(self.points))  # Points of a node are index[start:end]
+        self.start, self.end, self.axis, self.split, self.children = [], [], [], [], []
+        stack = [self._add_node(0, len(self.points))]
+        while stack:
+            node = stack.pop()
+            start, end = self.start[node], self.end[node]
+            if end - start <= leaf_size:
+                continue
+            points = self.points[self.index[start:end]]
+            axis = int(np.argmax(points.max(axis=0) - points.min(axis=0)))
+            middle = (end - start) // 2
+            partition = np.argpartition(points[:, axis], middle)
+            self.index[start:end] = self.index[start:end][partition]
+            self.axis[node], self.split[node] = axis, points[partition[middle], axis]
+            self.children[node] = (self._add_node(start, start + middle), self._add_node(start + middle, end))
+            stack.extend(self.children[node])
+
+    def _add_node(self, start: int, end: int):
+        self.start.append(start)
+        self.end.append(end)
+        self.axis.append(0)
+        self.split.append(0.0)
+        self.children.append(None)
+        return len(self.start) - 1
+
+    def query(self, point, k: int = 1):
+        """Nearest points to point
+        :param point: (D,) coordinates
+        :param k: number of nearest points
+        :return: distances and indices of up to k nearest points sorted by distance"""
+
+        point = np.asarray(point, dtype=float)
+        distances, indices = np.empty(0), np.empty(0, dtype=int)
+        stack = [(0, 0.0)]  # Node and lower bound of its squared distance to point
+        while stack:
+            node, bound = stack.pop()
+            if len(distances) == k and bound > distances[-1]:
+                continue
+            if self.children[node] is None:
+                index = self.index[self.start[node]:self.end[node]]
+                distances = np.concatenate([distances, ((self.points[index] - point) ** 2).sum(axis=1)])
+                indices = np.concatenate([indices, index])
+                order = np.argsort(distances, kind='stable')[:k]
+                distances, indices = distances[order], indices[order]
+                continue
+            offset = point[self.axis[node]] - self.split[node]
+            near, far = self.children[node] if offset < 0 else self.children[node][::-1]
+            stack.append((far, max(bound, offset ** 2)))
+            stack.append((near, bound))  # Searched first
+        return np.sqrt(distances), indices
+
+
+class PointSet:
+
+    def __init__(self, axes, capacity: int = 256):
+        """Marked points backed by arrays that grow as points are added. Positions are kept in the stage coordinate
+        system so points stay in place when the coordinate transformation map changes
+        :param axes: stage axes of position columns e.g. ['t', 'x', 'y', 'z']
+        :param capacity: number of points space is reserved for"""
+
+        self.axes = list(axes)
+        self.size = 0
+        self._positions = np.zeros((capacity, len(self.axes)))
+        self._colors = np.zeros((capacity, 4), dtype=np.float32)
+        self._labels = np.zeros(capacity, dtype=object)
+
+    def _get_positions(self):
+        return self._positions[:self.size]
+
+    def _get_colors(self):
+        return self._colors[:self.size]
+
+    def _get_labels(self):
+        return self._labels[:self.size]
+
+    def __len__(self):
+        return self.size
+
+    def columns(self, axes, start: int = 0):
+        """Positions of points along axes. Axes not in point set are 0
+        :param start: index of first point
+        :return: (N - start, len(axes)) array"""
+
+        columns = np.zeros((max(self.size - start, 0), len(axes)))
+        for i, k in enumerate(axes):
+            if k in self.axes:
+                columns[:, i] = self._positions[start:self.size, self.axes.index(k)]
+        return columns
+
+    def add(self, positions, colors=(1, 1, 1, 1), labels=''):
+        """Add points
+        :param positions: (N, len(axes)) array or list of stage position dictionaries
+        :param colors: (N, 4) array of rgba colors from 0 to 1 or one color for all points
+        :param labels: list of labels or one label for all points
+        :return: indices of added points"""
+
+        if len(positions) and isinstance(positions[0], dict):
+            positions = [[position.get(k, 0) for k in self.axes] for position in positions]
+        positions = np.asarray(positions, dtype=float).reshape(-1, len(self.axes))
+        count = len(positions)
+        if self.size + count > len(self._positions):
+            capacity = max(2 * len(self._positions), self.size + count)
+            for name in ['_positions', '_colors', '_labels']:
+                array = getattr(self, name)
+                grown = np.zeros((capacity, *array.shape[1:]), dtype=array.dtype)
+                grown[:self.size] = array[:self.size]
+                setattr(self, name, grown)
+        indices = np.arange(self.size, self.size + count)
+        self._positions[indices] = positions
+        self._colors[indices] = colors
+        self._labels[indices] = [labels] * count if isinstance(labels, str) else list(labels)
+        self.size += count
+        return indices
+
+    def remove(self, indices):
+        """Remove points. Points after removed points move down to fill the gap"""
+
+        keep = np.ones(self.size, dtype=bool)
+        keep[np.asarray(indices, dtype=int)] = False
+        count = int(keep.sum())
+        for array in [self._positions, self._colors, self._labels]:
+            array[:count] = array[:self.size][keep]
+        self._labels[count:self.size] = 0
+        self.size = count
+
+    def clear(self):
+        """Remove all points"""
+
+        self.remove(np.arange(self.size))
+
+    def save(self, path):
+        """Write points to a .npz file of stage positions, colors and labels"""
+
+        np.savez(path, axes=np.array(self.axes, dtype=str), positions=self.positions, colors=self.colors,
+                 labels=np.array([str(label) for label in self.labels], dtype=str))
+
+    @classmethod
+    def load(cls, path):
+        """Read point set written by save"""
+
+        with np.load(path, allow_pickle=False) as data:
+            points = cls(data['axes'].tolist(), max(len(data['positions']), 1))
+            points.add(data['positions'], data['colors'], data['labels'].tolist())
+        return points
+
+    positions = property(fget=_get_positions)
+    colors = property(fget=_get_colors)
+    labels = property(fget=_get_labels)
@@ -0,0 +1,188 @@
+import json
+import numpy as np
+import struct
+import threading
+from time import perf_counter, sleep
+
+MAGIC = b'CPREC\x01'  # File type and format version
+ATTRIBUTES = ['fov', 'scanning_volume', 'coordinate_transformation_map', 'limits', 'tile_overlap_pct']
+AXIS, POSITION, ATTRIBUTE = 0, 1, 2  # Record types
+HEADER = struct.Struct('<Bd')  # Record type and seconds since recording started
+AXIS_RECORD = struct.Struct('<BBB')  # Record type, axis id and length of axis name
+ATTRIBUTE_RECORD = struct.Struct('<BdBI')  # Header, attribute index and length of json value
+AXIS_VALUE = struct.Struct('<Bd')  # Axis id and value
+
+
+class Recorder:
+
+    def __init__(self, path):
+        """Log of timestamped stage positions and attribute changes in a compact binary file. Axis names are written
+        once and positions as an 8 byte time, a count and an axis id and double per changed axis, so a 4 axis position
+        takes 46 bytes. Attribute changes are rare and written as json. Safe to call from any thread
+        :param path: file to write"""
+
+        self.path = path
+        self.count = 0  # Number of positions and attribute changes written
+        self._file = open(path, 'wb')
+        self._file.write(MAGIC)
+        self._axes = {}  # Axis name and its id
+        self._position = {}  # Last recorded stage position
+        self._attributes = {}  # Last recorded value of attributes
+        self._structs = {}  # Position record layout by number of axes
+        self._lock = threading.Lock()
+        self._start = perf_counter()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def record_position(self, stage_position: dict, timestamp: float = None):
+        """Write stage position. Axes equal to the last recorded position are skipped
+        :param stage_position: position of stage in stage coordinate system e.g. {x:10, y:10, z:10}
+        :param timestamp: seconds since recording started. Defaults to now"""
+
+        with self._lock:
+            timestamp = perf_counter() - self._start if timestamp is None else timestamp
+            changed = {k: float(v) for k, v in stage_position.items() if self._position.get(k) != v}
+            if not changed:
+                return
+            for k in changed:
+                if k not in self._axes:
+                    name = k.encode()
+                    self._axes[k] = len(self._axes)
+                    self._file.write(AXIS_RECORD.pack(AXIS, self._axes[k], len(name)) + name)
+            if len(changed) not in self._structs:
+                self._structs[len(changed)] = struct.Struct('<BdB' + 'Bd' * len(changed))
+            values = [value for k, v in changed.items() for value in (self._axes[k], v)]
+            self._file.write(self._structs[len(changed)].pack(POSITION, timestamp, len(changed), *values))
+            self._position.update(changed)
+            self.count += 1
+
+    def record_attribute(self, name: str, value: dict, timestamp: float = None):
+        """Write value of attribute. Values equal to the last recorded value are skipped
+        :param name: one of ATTRIBUTES
+        :param value: value of attribute in stage coordinate system
+        :param timestamp: seconds since recording started. Defaults to now"""
+
+        with self._lock:
+            timestamp = perf_counter() - self._start if timestamp is None else timestamp
+            value = plain(value)
+            if self._attributes.get(name) == value:
+                return
+            data = json.dumps(value).encode()
+            self._file.write(ATTRIBUTE_RECORD.pack(ATTRIBUTE, timestamp, ATTRIBUTES.index(name), len(data)) + data)
+            self._attributes[name] = value
+            self.count += 1
+
+    def record_changes(self, values: dict, timestamp: float = None):
+        """Write stage position and attributes that differ from the last recorded values
+        :param values: dictionary of stage_position and attributes in ATTRIBUTES"""
+
+        for name, value in values.items():
+            if name == 'stage_position':
+                self.record_position(value, timestamp)
+            else:
+                self.record_attribute(name, value, timestamp)
+
+    def flush(self):
+        """Write buffered records to file"""
+
+        with self._lock:
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def plain(value):
+    """Value with numbers as python floats and arrays, tuples and limit pairs as lists so numpy values can be written
+    as json. Strings e.g. of a coordinate transformation map are kept"""
+
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        return {str(k): plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [plain(v) for v in value]
+    return float(value)
+
+
+def read_recording(path):
+    """Read file written by Recorder one record at a time so long recordings never have to fit in memory
+    :param path: recording file
+    :return: generator of timestamp, name and value of records. Name is stage_position for positions and the attribute
+    name otherwise. Positions only hold axes that changed"""
+
+    with open(path, 'rb') as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f'{path} is not a co-pylot recording')
+        axes = {}
+        while kind := file.read(1):
+            kind = kind[0]
+            if kind == AXIS:
+                axis, length = file.read(AXIS_RECORD.size - 1)
+                axes[axis] = file.read(length).decode()
+            elif kind == POSITION:
+                data = file.read(HEADER.size)  # Time and count following record type
+                timestamp, = struct.unpack_from('<d', data)
+                data = file.read(AXIS_VALUE.size * data[-1])
+                yield timestamp, 'stage_position', {axes[axis]: value for axis, value in AXIS_VALUE.iter_unpack(data)}
+            elif kind == ATTRIBUTE:
+                _, timestamp, index, length = ATTRIBUTE_RECORD.unpack(bytes([kind]) +
+                                                                      file.read(ATTRIBUTE_RECORD.size - 1))
+                yield timestamp, ATTRIBUTES[index], json.loads(file.read(length))
+            else:
+                raise ValueError(f'Unknown record type {kind} at byte {file.tell() - 1} of {path}')
+
+
+class Replayer:
+
+    def __init__(self, path, speed: float = 1.0):
+        """Feed a recording back into a widget through its thread safe push_stage_position and push_attribute
+        :param path: file written by Recorder
+        :param speed: playback rate relative to the recording e.g. 2 for twice as fast. None plays as fast as possible"""
+
+        self.path = path
+        self.speed = speed
+        self.played = 0  # Number of records fed to target
+        self.elapsed = 0  # Seconds playback took
+        self._stop = threading.Event()
+
+    def play(self, target):
+        """Feed records into target in the calling thread, waiting between records unless speed is None
+        :param target: object with push_stage_position and push_attribute e.g. CoPylot
+        :return: number of records fed"""
+
+        self._stop.clear()
+        self.played = 0
+        start = perf_counter()
+        for timestamp, name, value in read_recording(self.path):
+            if self.speed is not None:
+                wait = start + timestamp / self.speed - perf_counter()
+                if wait > 0:
+                    sleep(wait)
+            if self._stop.is_set():
+                break
+            if name == 'stage_position':
+                target.push_stage_position(value)
+            else:
+                target.push_attribute(name, value)
+            self.played += 1
+        self.elapsed = perf_counter() - start
+        return self.played
+
+    def start(self, target):
+        """Play records into target from a background thread so the gui keeps processing updates
+        :return: started thread"""
+
+        thread = threading.Thread(target=self.play, args=(target,), daemon=True, name='co-pylot-replayer')
+        thread.start()
+        return thread
+
+    def stop(self):
+        """Stop playback after the current record"""
+
+        self._stop.set()
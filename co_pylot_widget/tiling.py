@@ -0,0 +1,93 @@
+import numpy as np
+from math import ceil
+
+# Corners of a unit box and the pairs of corners joined by its 12 edges
+BOX_CORNERS = np.array([[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0],
+                        [0, 0, 1], [1, 0, 1], [1, 1, 1], [0, 1, 1]], dtype=np.float32)
+BOX_EDGES = np.array([[0, 1], [1, 2], [2, 3], [3, 0],
+                      [4, 5], [5, 6], [6, 7], [7, 4],
+                      [0, 4], [1, 5], [2, 6], [3, 7]])
+CHUNK_SIZE = 65536  # Tiles generated at once by tile plans
+
+
+def tile_grid(scanning_volume: dict, fov: dict, tile_overlap_pct: dict, axes=('x', 'y', 'z')):
+    """Calculate grid steps, number of tiles and tile size of scan volume. All values must be in the same coordinate
+    system
+    :param scanning_volume: volume of scan e.g. {x:110, y:60, z:200}
+    :param fov: size of camera fov e.g. {x:2304, y:1152}
+    :param tile_overlap_pct: overlap between tiles e.g. {x:15, y:15}
+    :param axes: the three axes of the grid
+    :return: grid step, number of steps and tile size dictionaries for the axes"""
+
+    grid_step = {k: (1 - abs(tile_overlap_pct.get(k, 0)) / 100.0) * fov.get(k, 1) for k in axes}
+    steps = {k: 1 + ceil((scanning_volume.get(k, 0) - fov.get(k, scanning_volume.get(k, 0))) /
+                         grid_step.get(k, 0)) for k in axes}
+    tile_volume = {k: fov.get(k, scanning_volume.get(k, 0)) for k in axes}
+    return grid_step, steps, tile_volume
+
+
+def grid_chunks(grid_step, steps, offset, order: str = 'raster', chunk_size: int = CHUNK_SIZE):
+    """Lazily generate the points of a regular grid in chunks so large grids never exist as a whole. The first axis
+    changes fastest
+    :param grid_step: (3,) distance between points along each axis
+    :param steps: (3,) number of points along each axis
+    :param offset: (3,) first point of grid
+    :param order: 'raster' visits every row in the same direction. 'serpentine' reverses every other row and plane so
+    consecutive points are always neighbours
+    :param chunk_size: most points per chunk
+    :return: generator of (n, 3) arrays of points"""
+
+    if order not in ('raster', 'serpentine'):
+        raise ValueError(f"order must be 'raster' or 'serpentine' not {order!r}")
+    steps = [max(int(n), 0) for n in steps]
+    grid_step, offset = np.asarray(grid_step, dtype=float), np.asarray(offset, dtype=float)
+    total = int(np.prod(steps))
+    for start in range(0, total, chunk_size):
+        index = np.arange(start, min(start + chunk_size, total))
+        counters = np.empty((len(index), len(steps)), dtype=np.int64)
+        block = 1  # Number of points of all faster axes
+        for axis, n in enumerate(steps):
+            counters[:, axis] = (index // block) % n
+            if order == 'serpentine':  # Reverse axis on every odd row or plane of the slower axes
+                reverse = (index // (block * n)) % 2 == 1
+                counters[reverse, axis] = n - 1 - counters[reverse, axis]
+            block *= n
+        yield offset + counters * grid_step
+
+
+def tile_plan(scanning_volume: dict, fov: dict, tile_overlap_pct: dict, axes=('x', 'y', 'z'), start=(0, 0, 0),
+              order: str = 'raster', chunk_size: int = CHUNK_SIZE):
+    """Lazily generate the position every tile of a scan is imaged at in chunks. The fov of a tile is centered on its
+    position like the first tile is centered on the stage position. Tiles along the first axis are visited fastest. All
+    values must be in the same coordinate system
+    :param start: (3,) position of first tile, ordered as axes
+    :param order: 'raster' or 'serpentine'. See grid_chunks
+    :param chunk_size: most tiles per chunk
+    :return: generator of (n, 3) arrays of positions ordered as axes"""
+
+    grid_step, steps, tile_volume = tile_grid(scanning_volume, fov, tile_overlap_pct, axes)
+    return grid_chunks([grid_step[k] for k in axes], [steps[k] for k in axes], start, order, chunk_size)
+
+
+def merge_factors(steps, max_tiles: int):
+    """Number of neighbouring tiles along each axis to merge into one box so a grid has at most max_tiles boxes. The
+    axis with the most boxes is coarsened first
+    :param steps: (3,) number of tiles along each axis
+    :return: (3,) array of tiles per box"""
+
+    steps = np.maximum(np.asarray(steps, dtype=np.int64), 1)
+    factors = np.ones(len(steps), dtype=np.int64)
+    while np.prod(-(-steps // factors)) > max(max_tiles, 1):
+        factors[np.argmax(-(-steps // factors))] *= 2
+    return np.minimum(factors, steps)
+
+
+def box_edge_vertices(corners, size):
+    """Vertices of the edges of boxes for drawing as line segments
+    :param corners: (N, 3) array of lower corners of boxes
+    :param size: x, y, z size shared by all boxes or (N, 3) array of size of each box
+    :return: (N*24, 3) array where each consecutive pair of vertices is one edge"""
+
+    corners = np.asarray(corners, dtype=np.float32)
+    size = np.asarray(size, dtype=np.float32).reshape(-1, 1, 3)
+    return (corners[:, None, :] + BOX_CORNERS[BOX_EDGES.ravel()][None, :, :] * size).reshape(-1, 3)
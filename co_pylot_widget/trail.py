@@ -0,0 +1,60 @@
+import numpy as np
+
+
+class Trail:
+
+    def __init__(self, capacity: int = 10000, min_segment: float = 0):
+        """Trajectory of the stage as line segments in a fixed size ring buffer. Every new position adds a segment from
+        the previous position and once capacity segments are stored the oldest is overwritten, so memory and the cost of
+        adding a position stay constant. Segments are drawn as separate lines so their order in the buffer does not
+        matter and the buffer is handed to the line item as is
+        :param capacity: most segments kept
+        :param min_segment: positions closer than this to the start of the newest segment move its end instead of adding
+        a segment, which thins out dense stretches of slow moves"""
+
+        self.capacity = capacity
+        self.min_segment = min_segment
+        self.vertexes = np.zeros((2 * capacity, 3), dtype=np.float32)  # Start and end of every segment
+        self.size = 0
+        self._newest = -1
+        self._last = None  # Last position appended
+
+    def append(self, position):
+        """Add position to trajectory
+        :param position: (3,) map coordinates
+        :return: whether segments changed"""
+
+        position = np.asarray(position, dtype=np.float32)
+        if self._last is None or (position == self._last).all():
+            self._last = position
+            return False
+        if self.size and np.linalg.norm(position - self.vertexes[2 * self._newest]) < self.min_segment:
+            self.vertexes[2 * self._newest + 1] = position
+        else:
+            self._newest = (self._newest + 1) % self.capacity
+            self.vertexes[2 * self._newest] = self._last
+            self.vertexes[2 * self._newest + 1] = position
+            self.size = min(self.size + 1, self.capacity)
+        self._last = position
+        return True
+
+    def segments(self):
+        """Start and end vertices of stored segments without copying
+        :return: (2 * size, 3) view of buffer"""
+
+        return self.vertexes[:2 * self.size]
+
+    def transform(self, matrix):
+        """Transform trajectory in place e.g. when the coordinate transformation map changes
+        :param matrix: 3x3 matrix applied to every position"""
+
+        self.vertexes[:] = self.vertexes @ np.asarray(matrix, dtype=np.float32).T
+        if self._last is not None:
+            self._last = self._last @ np.asarray(matrix, dtype=np.float32).T
+
+    def clear(self):
+        """Remove all segments"""
+
+        self.size = 0
+        self._newest = -1
+        self._last = None
@@ -1,5 +1,6 @@
 from co_pylot_widget.copylot import CoPylot
 import sys
+from qtpy.QtCore import QObject, Qt, Signal
 from qtpy.QtWidgets import QApplication
 import random
 from time import sleep
@@ -14,6 +15,11 @@ RESOURCES_DIR = (
 EXAMPLE_OBJECTIVE = RESOURCES_DIR / "di-spim-tissue-map.STL"
 EXAMPLE_MOUNT = RESOURCES_DIR / "di-spim-holder.STL"
 
+class StageCommands(QObject):
+    """Requests emitted from the stage thread and queued to the gui thread"""
+    removeModel = Signal(str)
+
+
 def randomwalk1D(start_num, n, prob=10):
     x = start_num
     xposition = [x]
@@ -28,17 +34,17 @@ def stagewalk(x, y, z, t):
     for i in range(0, 100):
         if i == 25:
             print('changing scanning volume')
-            stagemap.scanning_volume = {'x':400, 'y':50, 'z':150}
+            stagemap.push_attribute('scanning_volume', {'x':400, 'y':50, 'z':150})  # Thread safe attribute update
         if i == 50:
             print('changing fov')
-            stagemap.fov = {'x': 50, 'y':50}
+            stagemap.push_attribute('fov', {'x': 50, 'y':50})
         if i ==75:
             print('changing coordinate transform')
-            stagemap.coordinate_transformation_map = {'x': 'y', 'y': 'z', 'z': '-x'}
+            stagemap.push_attribute('coordinate_transformation_map', {'x': 'y', 'y': 'z', 'z': '-x'})
         if i ==99:
             print('Removing objectives')
-            stagemap.remove_cad_model('objectives')
-        stagemap.stage_position = {'x':x[i], 'y':y[i], 'z':z[i], 't':t[i]}
+            commands.removeModel.emit('objectives')  # Gl items are only touched in the gui thread
+        stagemap.push_stage_position({'x':x[i], 'y':y[i], 'z':z[i], 't':t[i]})  # Thread safe position update
         sleep(.5)
 
 if __name__ == "__main__":
@@ -72,6 +78,8 @@ if __name__ == "__main__":
                             0, 'cos(t)','sin(t)', 'y',
                             0, '-sin(t)', 'cos(t)', (abs(stagemap.limits['z'][1]) - abs(stagemap.limits['z'][0])) / 2,
                             0, 0, 0, 1))
+    commands = StageCommands()
+    commands.removeModel.connect(stagemap.remove_cad_model, Qt.QueuedConnection)
     x = randomwalk1D(stagemap.stage_position['x'], 100)
     y = randomwalk1D(stagemap.stage_position['y'], 100)
     z = randomwalk1D(stagemap.stage_position['z'], 100)
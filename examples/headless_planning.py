@@ -0,0 +1,55 @@
+"""Pre-flight check of candidate scans without a gui. Tile positions and clearance between objective and mount are
+computed for many scan start positions across a process pool using the Qt free geometry engine. The engine is sent to
+each worker once"""
+from co_pylot_widget.engine import GeometryEngine
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import numpy as np
+import os
+
+RESOURCES_DIR = (
+    Path(os.path.dirname(os.path.realpath(__file__))) / "resources"
+)
+EXAMPLE_OBJECTIVE = RESOURCES_DIR / "di-spim-tissue-map.STL"
+EXAMPLE_MOUNT = RESOURCES_DIR / "di-spim-holder.STL"
+
+SCANNING_VOLUME = {'x': 400, 'y': 50, 'z': 150}
+FOV = {'x': 20, 'y': 20}
+TILE_OVERLAP_PCT = {'x': 15, 'y': 15}
+MIN_CLEARANCE = 2
+
+
+ENGINE = None  # Engine of worker process set once by init_worker
+
+
+def init_worker(engine):
+    """Keep engine in worker process so meshes are copied and bounding volume hierarchies built once per worker rather
+    than once per scan"""
+    global ENGINE
+    ENGINE = engine
+
+
+def check_scan(start):
+    """Smallest clearance between objective and mount over the tiles of a scan starting at start"""
+    tiles = ENGINE.tile_positions(start, SCANNING_VOLUME, FOV, TILE_OVERLAP_PCT)
+    axes = ENGINE.coordinate_transform.stage_axes
+    distances = [ENGINE.clearance('objectives', 'mount', {**start, **dict(zip(axes, tile))}, cutoff=MIN_CLEARANCE)[0]
+                 for tile in tiles]
+    return start, len(tiles), min(distances)
+
+
+if __name__ == "__main__":
+    engine = GeometryEngine({'x': 'z', 'y': 'x', 'z': '-y'})
+    engine.load_model('objectives', EXAMPLE_OBJECTIVE, (1, 0, 0, 0,
+                                                        0, 1, 0, 0,
+                                                        0, 0, 1, 0,
+                                                        0, 0, 0, 1))
+    engine.load_model('mount', EXAMPLE_MOUNT, (1, 0, 0, 'x',
+                                               0, 1, 0, 'y',
+                                               0, 0, 1, 'z',
+                                               0, 0, 0, 1))
+    starts = [{'x': x, 'y': y, 'z': 200, 't': 0} for x in np.linspace(-100, 100, 5) for y in np.linspace(-200, 200, 5)]
+    with ProcessPoolExecutor(initializer=init_worker, initargs=(engine,)) as pool:
+        for start, n_tiles, distance in pool.map(check_scan, starts):
+            status = 'ok' if distance >= MIN_CLEARANCE else 'COLLISION RISK'
+            print(f'x={start["x"]:7.1f} y={start["y"]:7.1f} {n_tiles:4d} tiles clearance {distance:7.2f} {status}')